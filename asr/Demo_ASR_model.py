@@ -6,11 +6,25 @@ Converted from Jupyter notebook to Python script
 
 import os
 import sys
+import copy
+import threading
 import torch
 import soundfile as sf
 import numpy as np
-from transformers import AutoProcessor, AutoModelForSpeechSeq2Seq
+from transformers import (
+    AutoProcessor, AutoModelForSpeechSeq2Seq, LogitsProcessorList, StoppingCriteriaList
+)
+from transformers.modeling_outputs import BaseModelOutput
 from huggingface_hub import login
+from audio_reader import stream_audio_chunks, DEFAULT_CHUNK_SECONDS
+from audio_codecs import decode_audio_bytes, resample_audio
+from shared_weights import load_mapped_model
+from biasing import get_biasing_cache
+from adapters import AdapterCache, attach_lora, use_adapters, DEFAULT_ADAPTER_CACHE_SIZE
+from cancellation import (
+    CancellationStoppingCriteria, continue_generation, deadline_from_timeout, is_expired,
+    CANCELLED_MESSAGE, DEADLINE_MESSAGE
+)
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -21,14 +35,26 @@ class IndicASR:
     """
     Automatic Speech Recognition class for Indian languages using AI4Bharat models.
     Supports Hindi, Tamil, and Gujarati languages.
+
+    The transcription methods keep no per-call state on the instance, so one
+    instance can serve several threads; use InferenceLanes to bound the
+    concurrency and torch thread counts.
     """
     
-    def __init__(self, language="hi"):
+    def __init__(self, language="hi", weights_path=None, feature_store=None, adapter_dir=None,
+                 adapter_cache_size=DEFAULT_ADAPTER_CACHE_SIZE):
         """
         Initialize the ASR model for a specific language.
 
         Args:
             language (str): Language code ('hi' for Hindi, 'ta' for Tamil, 'gu' for Gujarati)
+            weights_path (str): Optional safetensors file written by shared_weights.export_weights;
+                the weights are memory-mapped read-only instead of loaded (CPU only)
+            feature_store (FeatureStore): Optional on-disk cache of features and encoder
+                outputs; re-decoding the same audio then skips the encoder
+            adapter_dir (str): Optional directory of per-speaker / per-tenant LoRA adapters
+                (PEFT directories, .safetensors or .pt files named by adapter id)
+            adapter_cache_size (int): Number of adapters kept in memory
         """
         self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
         self.torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
@@ -46,27 +72,78 @@ class IndicASR:
         print(f"Loading model for {language} from {self.model_id}...")
         
         # Load the pre-trained model and processor
-        self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
-            self.model_id,
-            torch_dtype=self.torch_dtype,
-            low_cpu_mem_usage=True,
-            use_safetensors=True,
-            token=HF_TOKEN
-        ).to(self.device)
+        if weights_path is not None:
+            # Several processes mapping the same file share one copy of the weights
+            self.device = "cpu"
+            self.model = load_mapped_model(self.model_id, weights_path, torch.float32, token=HF_TOKEN)
+            self.torch_dtype = next(self.model.parameters()).dtype
+        else:
+            self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                self.model_id,
+                torch_dtype=self.torch_dtype,
+                low_cpu_mem_usage=True,
+                use_safetensors=True,
+                token=HF_TOKEN
+            ).to(self.device)
         
         self.processor = AutoProcessor.from_pretrained(
             self.model_id,
             token=HF_TOKEN
         )
         
+        self.feature_store = feature_store
+        
+        # Decoder layers are hooked before any quantized copy is made, so every
+        # tier can apply adapters on top of the shared base weights
+        self.adapter_cache = None
+        if adapter_dir is not None:
+            self.adapter_cache = AdapterCache(
+                adapter_dir,
+                adapter_cache_size,
+                device=self.device,
+                dtype=self.torch_dtype,
+                module_shapes=attach_lora(self.model)
+            )
+        
+        # Int8 copy for the cheapest load-shedding tier, built on first use
+        self.quantized_model = None
+        self._quantize_lock = threading.Lock()
+        
         print(f"Model loaded successfully on {self.device}")
     
-    def transcribe(self, audio_path):
+    def __getstate__(self):
+        """
+        Drop the lock when pickling, e.g. for workers started with 'spawn'.
+        """
+        state = self.__dict__.copy()
+        state.pop("_quantize_lock", None)
+        return state
+    
+    def __setstate__(self, state):
+        """
+        Restore a pickled instance with a fresh lock.
+        """
+        self.__dict__.update(state)
+        self._quantize_lock = threading.Lock()
+    
+    def transcribe(self, audio_path, chunk_seconds=DEFAULT_CHUNK_SECONDS, prompt=None, hotwords=None,
+                   tier=None, timeout=None, cancel_token=None, adapter_id=None):
         """
         Transcribe speech from an audio file.
 
+        The file is streamed in fixed-size chunks, so peak memory depends on
+        the chunk length rather than the length of the recording.
+
         Args:
             audio_path (str): Path to the audio file (WAV format recommended)
+            chunk_seconds (float): Length of each transcribed chunk in seconds (at most 30,
+                the longest window Whisper accepts)
+            prompt (str): Optional initial prompt biasing the decoder (e.g. domain vocabulary)
+            hotwords (list or dict): Optional hotwords, or hotword -> logit boost mapping
+            tier (QualityTier): Optional decoding tier (beams, token budget, quantized model)
+            timeout (float): Optional time budget in seconds for the whole file
+            cancel_token (CancellationToken): Optional token to abandon the request
+            adapter_id (str): Optional speaker or tenant adapter to decode with
 
         Returns:
             str: Transcribed text
@@ -75,60 +152,340 @@ class IndicASR:
             if not os.path.exists(audio_path):
                 return f"Error: Audio file not found at {audio_path}"
             
-            # Read the audio file
-            audio_data, sampling_rate = sf.read(audio_path, dtype='float32')
+            # Whisper features cover 30 s; longer chunks would be silently truncated
+            if chunk_seconds > DEFAULT_CHUNK_SECONDS:
+                return f"Error: chunk_seconds must be at most {DEFAULT_CHUNK_SECONDS}, got {chunk_seconds}"
             
-            # Process audio to get input features
-            input_features = self.processor(
-                audio_data,
-                sampling_rate=sampling_rate,
-                return_tensors="pt"
-            ).input_features.to(self.device, dtype=self.torch_dtype)
+            deadline = deadline_from_timeout(timeout)
+            transcriptions = []
+            for audio_data, sampling_rate in stream_audio_chunks(audio_path, chunk_seconds):
+                text = self._transcribe_batch(
+                    [audio_data], sampling_rate, prompt, hotwords, tier,
+                    deadline=deadline, cancel_tokens=[cancel_token], adapter_ids=[adapter_id]
+                )[0]
+                if text in (CANCELLED_MESSAGE, DEADLINE_MESSAGE):
+                    return text
+                transcriptions.append(text)
             
-            # Generate transcription
-            predicted_ids = self.model.generate(
-                input_features,
-                max_new_tokens=128
-            )
-            
-            # Decode predicted IDs to text
-            transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-            return transcription
+            return " ".join(text.strip() for text in transcriptions if text.strip())
             
         except Exception as e:
             return f"An error occurred during transcription: {e}"
     
-    def transcribe_audio_data(self, audio_data, sampling_rate):
+    def transcribe_audio_data(self, audio_data, sampling_rate, prompt=None, hotwords=None, tier=None,
+                              timeout=None, cancel_token=None, adapter_id=None):
         """
         Transcribe speech from audio data (numpy array).
 
         Args:
             audio_data (np.ndarray): Audio data as numpy array
             sampling_rate (int): Sampling rate of the audio
+            prompt (str): Optional initial prompt biasing the decoder
+            hotwords (list or dict): Optional hotwords, or hotword -> logit boost mapping
+            tier (QualityTier): Optional decoding tier (beams, token budget, quantized model)
+            timeout (float): Optional time budget in seconds
+            cancel_token (CancellationToken): Optional token to abandon the request
+            adapter_id (str): Optional speaker or tenant adapter to decode with
+
+        Returns:
+            str: Transcribed text
+        """
+        try:
+            return self._transcribe_batch(
+                [audio_data], sampling_rate, prompt, hotwords, tier,
+                deadline=deadline_from_timeout(timeout), cancel_tokens=[cancel_token],
+                adapter_ids=[adapter_id]
+            )[0]
+        except Exception as e:
+            return f"An error occurred during transcription: {e}"
+    
+    def transcribe_batch(self, audio_batch, sampling_rate, prompt=None, hotwords=None, tier=None,
+                         timeout=None, cancel_tokens=None, adapter_ids=None):
+        """
+        Transcribe several audio segments with a single generate call.
+
+        Args:
+            audio_batch (list): List of np.ndarray segments (at most 30 s each)
+            sampling_rate (int): Sampling rate shared by all segments
+            prompt (str): Optional initial prompt shared by the batch
+            hotwords (list or dict): Optional hotwords, or hotword -> logit boost mapping
+            tier (QualityTier): Optional decoding tier (beams, token budget, quantized model)
+            timeout (float): Optional time budget in seconds for the batch
+            cancel_tokens (list): Optional CancellationToken (or None) per segment;
+                cancelled segments stop decoding while the rest of the batch continues
+            adapter_ids (list): Optional adapter id (or None for the base model) per segment;
+                segments with different adapters are decoded in the same generate call
+
+        Returns:
+            list: Transcribed text per segment, or one error string per segment
+        """
+        if len(audio_batch) == 0:
+            return []
+        
+        try:
+            return self._transcribe_batch(
+                audio_batch, sampling_rate, prompt, hotwords, tier,
+                deadline=deadline_from_timeout(timeout), cancel_tokens=cancel_tokens,
+                adapter_ids=adapter_ids
+            )
+        except Exception as e:
+            return [f"An error occurred during transcription: {e}"] * len(audio_batch)
+    
+    def transcribe_encoded(self, data, codec=None, sampling_rate=8000, **kwargs):
+        """
+        Transcribe compressed or telephony audio bytes without spawning ffmpeg.
+
+        Args:
+            data (bytes): Encoded audio (G.711 mu-law/A-law, Ogg/Opus, WebM/Opus, WAV, FLAC)
+            codec (str): Codec name; detected from the container when omitted
+                (raw G.711 must be named 'mulaw' or 'alaw')
+            sampling_rate (int): Sampling rate of raw G.711 input
+            **kwargs: Passed to transcribe_audio_data (prompt, hotwords, tier, ...)
 
         Returns:
             str: Transcribed text
         """
         try:
+            audio_data, sampling_rate = decode_audio_bytes(data, codec, sampling_rate)
+        except Exception as e:
+            return f"An error occurred while decoding audio: {e}"
+        
+        return self.transcribe_audio_data(audio_data, sampling_rate, **kwargs)
+    
+    def get_quantized_model(self):
+        """
+        Return a dynamically int8-quantized copy of the model for cheap decoding.
+
+        Quantization is CPU-only; on GPU the regular fp16 model is returned.
+
+        Returns:
+            torch.nn.Module: Quantized model
+        """
+        if self.device != "cpu":
+            return self.model
+        
+        with self._quantize_lock:
+            if self.quantized_model is None:
+                print(f"Quantizing {self.model_id} to int8...")
+                self.quantized_model = torch.quantization.quantize_dynamic(
+                    copy.deepcopy(self.model),
+                    {torch.nn.Linear},
+                    dtype=torch.qint8
+                ).eval()
+        return self.quantized_model
+    
+    def _generate_kwargs(self, prompt=None, hotwords=None):
+        """
+        Build the biasing arguments for model.generate.
+
+        Prompt tokenization and hotword tables are cached per vocabulary, so
+        repeated prompts and hotword lists add no tokenization cost.
+
+        Args:
+            prompt (str): Optional initial prompt
+            hotwords (list or dict): Optional hotwords, or hotword -> logit boost mapping
+
+        Returns:
+            dict: Extra keyword arguments for generate
+        """
+        kwargs = {}
+        if not prompt and not hotwords:
+            return kwargs
+        
+        cache = get_biasing_cache(self.processor)
+        if prompt:
+            kwargs["prompt_ids"] = cache.prompt_ids(prompt).to(self.device)
+        if hotwords:
+            kwargs["logits_processor"] = LogitsProcessorList([cache.hotword_processor(hotwords)])
+        return kwargs
+    
+    def _encode_with_store(self, audio_batch, sampling_rate):
+        """
+        Return encoder hidden states, reading and filling the feature store.
+
+        Encoder states found in the store are memory-mapped from disk. For the
+        rest, stored log-mel features are reused when present, the encoder runs
+        once on the remaining batch, and both results are written back.
+
+        Args:
+            audio_batch (list): List of 16 kHz np.ndarray windows
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            torch.Tensor: (batch, frames, hidden) encoder states
+        """
+        store = self.feature_store
+        keys = [store.make_key(audio, sampling_rate) for audio in audio_batch]
+        states = [store.get(self.model_id, key, "encoder") for key in keys]
+        missing = [i for i, state in enumerate(states) if state is None]
+        
+        if missing:
+            features = [store.get(self.model_id, keys[i], "features") for i in missing]
+            to_extract = [j for j, feature in enumerate(features) if feature is None]
+            if to_extract:
+                extracted = self.processor(
+                    [audio_batch[missing[j]] for j in to_extract],
+                    sampling_rate=sampling_rate,
+                    return_tensors="np"
+                ).input_features
+                for j, feature in zip(to_extract, extracted):
+                    store.put(self.model_id, keys[missing[j]], "features", feature)
+                    features[j] = feature
+            
+            input_features = torch.from_numpy(np.stack(features).astype(np.float32))
+            with torch.inference_mode():
+                encoded = self.model.get_encoder()(
+                    input_features.to(self.device, dtype=self.torch_dtype)
+                ).last_hidden_state.float().cpu().numpy()
+            
+            for position, i in enumerate(missing):
+                store.put(self.model_id, keys[i], "encoder", encoded[position])
+                # Decode from the stored precision so later runs match this one
+                states[i] = encoded[position].astype(store.dtype)
+        
+        encoder_states = torch.from_numpy(np.stack(states).astype(np.float32))
+        return encoder_states.to(self.device, dtype=self.torch_dtype)
+    
+    def _get_adapters(self, adapter_ids, active):
+        """
+        Look up the adapter of each active batch member.
+
+        Args:
+            adapter_ids (list): Adapter id or None per window, or None
+            active (list): Indices of the windows being decoded
+
+        Returns:
+            list: LoRAAdapter or None per active window
+        """
+        if adapter_ids is None or all(adapter_ids[i] is None for i in active):
+            return [None] * len(active)
+        if self.adapter_cache is None:
+            raise ValueError("Adapters require IndicASR(adapter_dir=...)")
+        
+        return [
+            None if adapter_ids[i] is None else self.adapter_cache.get(adapter_ids[i])
+            for i in active
+        ]
+    
+    def _transcribe_batch(self, audio_batch, sampling_rate, prompt=None, hotwords=None, tier=None,
+                          deadline=None, cancel_tokens=None, adapter_ids=None):
+        """
+        Run feature extraction, generation and decoding on a batch of windows.
+
+        Args:
+            audio_batch (list): List of np.ndarray audio windows
+            sampling_rate (int): Sampling rate of the audio
+            prompt (str): Optional initial prompt
+            hotwords (list or dict): Optional hotwords
+            tier (QualityTier): Optional decoding tier
+            deadline (float): Optional absolute time.monotonic() deadline
+            cancel_tokens (list): Optional CancellationToken (or None) per window
+            adapter_ids (list): Optional adapter id (or None) per window
+
+        Returns:
+            list: Transcribed text per window
+        """
+        cancel_tokens = list(cancel_tokens) if cancel_tokens is not None else [None] * len(audio_batch)
+        if is_expired(deadline):
+            return [DEADLINE_MESSAGE] * len(audio_batch)
+        
+        # Members cancelled before generation never reach the model
+        results = [CANCELLED_MESSAGE] * len(audio_batch)
+        active = [i for i, token in enumerate(cancel_tokens) if token is None or not token.cancelled]
+        if len(active) == 0:
+            return results
+        
+        adapters = self._get_adapters(adapter_ids, active)
+        
+        # Whisper features expect 16 kHz; telephony and browser audio often is not
+        target_rate = self.processor.feature_extractor.sampling_rate
+        active_audio = [audio_batch[i] for i in active]
+        if sampling_rate != target_rate:
+            active_audio = [resample_audio(audio, sampling_rate, target_rate) for audio in active_audio]
+            sampling_rate = target_rate
+        
+        model = self.model
+        max_new_tokens = 128
+        generate_kwargs = self._generate_kwargs(prompt, hotwords)
+        if tier is not None:
+            max_new_tokens = tier.max_new_tokens
+            generate_kwargs["num_beams"] = tier.num_beams
+            if tier.quantized:
+                model = self.get_quantized_model()
+        
+        # Encoder states are computed once, so the batch can be re-formed
+        # after a cancellation without encoding the audio again
+        if self.feature_store is not None and model is self.model:
+            # Cached encoder states let generate skip the encoder entirely
+            encoder_states = self._encode_with_store(active_audio, sampling_rate)
+        else:
             # Process audio to get input features
             input_features = self.processor(
-                audio_data,
+                active_audio,
                 sampling_rate=sampling_rate,
                 return_tensors="pt"
             ).input_features.to(self.device, dtype=self.torch_dtype)
+            with torch.inference_mode():
+                encoder_states = model.get_encoder()(input_features).last_hidden_state
+        
+        generation_config = model.generation_config
+        members = list(range(len(active)))
+        prefixes = None
+        while members:
+            if is_expired(deadline):
+                for member in members:
+                    results[active[member]] = DEADLINE_MESSAGE
+                break
             
-            # Generate transcription
-            predicted_ids = self.model.generate(
-                input_features,
-                max_new_tokens=128
+            # Ends the step for every row once a member is cancelled or the deadline passes
+            stopping = CancellationStoppingCriteria(
+                [cancel_tokens[active[member]] for member in members],
+                deadline,
+                eos_token_id=generation_config.eos_token_id,
+                pad_token_id=generation_config.pad_token_id
             )
+            round_kwargs = dict(generate_kwargs)
+            if prefixes is not None:
+                # Resumed rows already start with the prompt and task tokens
+                round_kwargs.pop("prompt_ids", None)
+                round_kwargs["decoder_input_ids"] = prefixes
+            
+            # Generate transcription
+            with torch.inference_mode(), use_adapters([adapters[member] for member in members]):
+                predicted_ids = model.generate(
+                    encoder_outputs=BaseModelOutput(last_hidden_state=encoder_states[members]),
+                    max_new_tokens=max_new_tokens,
+                    stopping_criteria=StoppingCriteriaList([stopping]),
+                    **round_kwargs
+                )
+            max_new_tokens -= stopping.generated_tokens
+            
+            # Drop cancelled members and resume the rest as a smaller batch
+            survivors = []
+            finished = []
+            for position, member in enumerate(members):
+                if position in stopping.cancelled:
+                    results[active[member]] = CANCELLED_MESSAGE
+                elif position in stopping.stopped:
+                    results[active[member]] = DEADLINE_MESSAGE
+                elif stopping.cancelled and not stopping.finished[position] and max_new_tokens > 0:
+                    survivors.append(position)
+                else:
+                    prefix = None if prefixes is None else prefixes[position]
+                    sequence = continue_generation(
+                        predicted_ids[position], prefix, generation_config.decoder_start_token_id
+                    )
+                    finished.append((member, sequence))
             
             # Decode predicted IDs to text
-            transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-            return transcription
+            texts = self.processor.batch_decode([sequence for _, sequence in finished], skip_special_tokens=True)
+            for (member, _), text in zip(finished, texts):
+                results[active[member]] = text
             
-        except Exception as e:
-            return f"An error occurred during transcription: {e}"
+            if survivors:
+                prefixes = stopping.survivor_prefixes(survivors)
+            members = [members[position] for position in survivors]
+        return results
 
 
 def create_sample_audio():
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Speaker Adapters - Per-speaker / per-tenant LoRA adapters for IndicASR
+Hot-swapped over shared base weights, LRU-cached, mixable within one batch
+"""
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import torch
+from safetensors import safe_open
+
+DEFAULT_ADAPTER_CACHE_SIZE = 32
+
+# Decoder attention projections; the encoder is left untouched so cached
+# encoder states (feature_store) stay valid for every adapter
+DEFAULT_TARGET_MODULES = ("q_proj", "v_proj")
+
+# Adapters selected by the generate call running on this thread
+_routing = threading.local()
+
+# PEFT key layout: base_model.model.<module>.lora_A[.default].weight
+LORA_KEY_PATTERN = re.compile(r"^(?:base_model\.model\.)?(.+)\.lora_([AB])(?:\.default)?(?:\.weight)?$")
+
+
+class LoRAAdapter:
+    """
+    Low-rank weight updates for a set of Linear layers.
+
+    Each target layer with weight W (out x in) gets W + scale * B @ A, where
+    A is (rank x in) and B is (out x rank).
+    """
+
+    def __init__(self, name, weights, scale=1.0):
+        """
+        Initialize the adapter.
+
+        Args:
+            name (str): Adapter id (speaker or tenant)
+            weights (dict): Module name -> (A, B) tensors
+            scale (float): lora_alpha / rank
+        """
+        self.name = name
+        self.weights = weights
+        self.scale = scale
+
+    @property
+    def rank(self):
+        """Rank of the first adapted layer."""
+        return next(iter(self.weights.values()))[0].shape[0] if self.weights else 0
+
+    def to(self, device, dtype):
+        """
+        Return a copy with all tensors on the given device and dtype.
+        """
+        weights = {
+            name: (A.to(device, dtype=dtype), B.to(device, dtype=dtype))
+            for name, (A, B) in self.weights.items()
+        }
+        return LoRAAdapter(self.name, weights, self.scale)
+
+
+def load_adapter(path, name=None, alpha=None):
+    """
+    Load a LoRA adapter saved by PEFT or as a plain state dict.
+
+    Args:
+        path (str): PEFT adapter directory (adapter_model.safetensors and
+            adapter_config.json), or a .safetensors / .pt file
+        name (str): Adapter id; defaults to the file or directory name
+        alpha (float): lora_alpha when no config or metadata provides it
+            (defaults to the rank, i.e. scale 1)
+
+    Returns:
+        LoRAAdapter: Adapter on CPU in its stored dtype
+    """
+    name = name or os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    config = {}
+
+    if os.path.isdir(path):
+        config_path = os.path.join(path, "adapter_config.json")
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as config_file:
+                config = json.load(config_file)
+        path = os.path.join(path, "adapter_model.safetensors")
+
+    if path.endswith(".safetensors"):
+        state_dict = {}
+        with safe_open(path, framework="pt", device="cpu") as tensors:
+            config = {**(tensors.metadata() or {}), **config}
+            for key in tensors.keys():
+                state_dict[key] = tensors.get_tensor(key)
+    else:
+        state_dict = torch.load(path, map_location="cpu", weights_only=True)
+
+    pairs = {}
+    for key, tensor in state_dict.items():
+        match = LORA_KEY_PATTERN.match(key)
+        if match is None:
+            continue
+        module_name, which = match.groups()
+        pairs.setdefault(module_name, {})[which] = tensor
+
+    weights = {}
+    for module_name, pair in pairs.items():
+        if set(pair) != {"A", "B"}:
+            raise ValueError(f"Adapter '{name}' is missing lora_A or lora_B for {module_name}")
+        if pair["A"].shape[0] != pair["B"].shape[1]:
+            raise ValueError(f"Adapter '{name}' has mismatched ranks for {module_name}")
+        weights[module_name] = (pair["A"], pair["B"])
+    if not weights:
+        raise ValueError(f"No LoRA weights found in {path}")
+
+    rank = next(iter(weights.values()))[0].shape[0]
+    alpha = float(config.get("lora_alpha", alpha if alpha is not None else rank))
+    return LoRAAdapter(name, weights, alpha / int(config.get("r", rank)))
+
+
+class _LoRAHook:
+    """
+    Forward hook adding the active adapters' update to one Linear layer.
+    """
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+
+    def __call__(self, module, inputs, output):
+        groups = getattr(_routing, "groups", None)
+        if groups is None:
+            return output
+
+        x = inputs[0]
+        members = _routing.members
+        if x.shape[0] % members:
+            raise RuntimeError(f"Cannot map {x.shape[0]} rows onto {members} batch members")
+        rows_per_member = x.shape[0] // members
+
+        for adapter, member_index in groups:
+            weights = adapter.weights.get(self.module_name)
+            if weights is None:
+                continue
+            A, B = weights
+
+            if member_index is None:
+                # Whole batch shares this adapter
+                output = output + (x @ A.t()) @ B.t() * adapter.scale
+                continue
+
+            # Rows expanded for beam search follow their batch member
+            rows = (member_index[:, None] * rows_per_member
+                    + torch.arange(rows_per_member, device=x.device)).flatten()
+            delta = (x.index_select(0, rows) @ A.t()) @ B.t() * adapter.scale
+            output = output.index_add(0, rows, delta.to(output.dtype))
+        return output
+
+
+def attach_lora(model, target_modules=DEFAULT_TARGET_MODULES):
+    """
+    Hook the decoder's target Linear layers so adapters can be applied per call.
+
+    The base weights and state dict are unchanged, and layers cost nothing
+    extra while no adapter is active. Calling this again is a no-op.
+
+    Args:
+        model (torch.nn.Module): Whisper model
+        target_modules (tuple): Linear layer names to adapt
+
+    Returns:
+        dict: Hooked module name -> (in_features, out_features)
+    """
+    hooked = getattr(model, "_lora_modules", None)
+    if hooked is not None:
+        return hooked
+
+    hooked = {}
+    for module_name, module in model.named_modules():
+        if ".decoder." not in f".{module_name}" or not isinstance(module, torch.nn.Linear):
+            continue
+        if module_name.rsplit(".", 1)[-1] in target_modules:
+            module.register_forward_hook(_LoRAHook(module_name))
+            hooked[module_name] = (module.in_features, module.out_features)
+
+    model._lora_modules = hooked
+    return hooked
+
+
+@contextmanager
+def use_adapters(adapters):
+    """
+    Apply adapters to the generate call made inside the block on this thread.
+
+    Members sharing an adapter are grouped, so each adapter costs two small
+    matmuls per layer regardless of how many members use it.
+
+    Args:
+        adapters (list): LoRAAdapter or None (base model) per batch member
+    """
+    previous = (getattr(_routing, "groups", None), getattr(_routing, "members", None))
+    groups = None
+    if any(adapter is not None for adapter in adapters):
+        by_name = OrderedDict()
+        for member, adapter in enumerate(adapters):
+            if adapter is not None:
+                by_name.setdefault(adapter.name, (adapter, []))[1].append(member)
+
+        device = next(iter(next(iter(by_name.values()))[0].weights.values()))[0].device
+        groups = []
+        for adapter, members in by_name.values():
+            member_index = None
+            if len(members) < len(adapters):
+                member_index = torch.tensor(members, device=device)
+            groups.append((adapter, member_index))
+
+    _routing.groups, _routing.members = groups, len(adapters)
+    try:
+        yield
+    finally:
+        _routing.groups, _routing.members = previous
+
+
+class AdapterCache:
+    """
+    Thread-safe LRU cache of adapters loaded from a directory.
+
+    Adapters are looked up as <adapter_dir>/<id> (PEFT directory),
+    <id>.safetensors or <id>.pt, moved to the model's device and dtype once,
+    and evicted least-recently-used when the cache is full.
+    """
+
+    def __init__(self, adapter_dir, capacity=DEFAULT_ADAPTER_CACHE_SIZE, device="cpu",
+                 dtype=torch.float32, module_shapes=None):
+        """
+        Initialize the cache.
+
+        Args:
+            adapter_dir (str): Directory holding adapters, or None for registered ones only
+            capacity (int): Maximum number of adapters kept in memory
+            device (str): Device adapters are moved to
+            dtype (torch.dtype): dtype adapters are cast to
+            module_shapes (dict): Hooked module name -> (in_features, out_features),
+                used to reject adapters built for a different model
+        """
+        if capacity < 1:
+            raise ValueError("Adapter cache capacity must be at least 1")
+
+        self.adapter_dir = adapter_dir
+        self.capacity = capacity
+        self.device = device
+        self.dtype = dtype
+        self.module_shapes = module_shapes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._adapters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """
+        Drop the lock when pickling, e.g. inside an IndicASR sent to spawned workers.
+        """
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled cache with a fresh lock.
+        """
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _find(self, adapter_id):
+        if not adapter_id or adapter_id.startswith(".") or "/" in adapter_id or os.sep in adapter_id:
+            raise ValueError(f"Invalid adapter id: {adapter_id!r}")
+        if self.adapter_dir is not None:
+            for candidate in (adapter_id, f"{adapter_id}.safetensors", f"{adapter_id}.pt"):
+                path = os.path.join(self.adapter_dir, candidate)
+                if os.path.exists(path):
+                    return path
+        raise FileNotFoundError(f"Adapter not found: {adapter_id}")
+
+    def _validate(self, adapter):
+        if self.module_shapes is None:
+            return
+        for module_name, (A, B) in adapter.weights.items():
+            if module_name not in self.module_shapes:
+                raise ValueError(f"Adapter '{adapter.name}' targets unknown module {module_name}")
+            in_features, out_features = self.module_shapes[module_name]
+            if A.shape[1] != in_features or B.shape[0] != out_features:
+                raise ValueError(f"Adapter '{adapter.name}' does not match the shape of {module_name}")
+
+    def _insert(self, adapter_id, adapter):
+        """
+        Store an adapter as most recently used (lock held).
+        """
+        self._adapters[adapter_id] = adapter
+        self._adapters.move_to_end(adapter_id)
+        while len(self._adapters) > self.capacity:
+            self._adapters.popitem(last=False)
+            self.evictions += 1
+
+    def register(self, adapter):
+        """
+        Add an in-memory adapter (e.g. one just trained) under its name.
+
+        Args:
+            adapter (LoRAAdapter): Adapter to serve
+        """
+        self._validate(adapter)
+        adapter = adapter.to(self.device, self.dtype)
+        with self._lock:
+            self._insert(adapter.name, adapter)
+
+    def get(self, adapter_id):
+        """
+        Return an adapter, loading it on a miss.
+
+        Args:
+            adapter_id (str): Speaker or tenant id
+
+        Returns:
+            LoRAAdapter: Adapter on the cache's device and dtype
+        """
+        with self._lock:
+            adapter = self._adapters.get(adapter_id)
+            if adapter is not None:
+                self._adapters.move_to_end(adapter_id)
+                self.hits += 1
+                return adapter
+            self.misses += 1
+
+        # Load outside the lock so hits on other adapters are not blocked
+        adapter = load_adapter(self._find(adapter_id), name=adapter_id)
+        self._validate(adapter)
+        adapter = adapter.to(self.device, self.dtype)
+        with self._lock:
+            self._insert(adapter_id, adapter)
+        return adapter
+
+    def evict(self, adapter_id):
+        """
+        Drop an adapter, e.g. after it was retrained on disk.
+
+        Args:
+            adapter_id (str): Speaker or tenant id
+        """
+        with self._lock:
+            self._adapters.pop(adapter_id, None)
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: Cached adapter ids (oldest first), hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                "adapters": list(self._adapters),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Audio Ring Buffer - Preallocated circular buffer for live microphone capture
+Feeds fixed-size windows to IndicASR without concatenating or copying audio
+"""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Single-producer / single-consumer ring buffer for PCM audio frames.
+
+    The backing numpy array is allocated twice as long as the capacity and every
+    write is mirrored into both halves, so any window of up to ``capacity``
+    samples is always a contiguous slice. Windows are returned as read-only
+    views into the buffer, never as copies.
+
+    Thread safety: one producer thread calls ``write`` and one consumer thread
+    calls ``peek`` / ``advance`` / ``windows``. Each side only updates its own
+    index, so no lock is needed. A view returned by ``peek`` stays valid until
+    the consumer advances past it.
+
+    Example:
+        buffer = AudioRingBuffer(capacity=16000 * 60)
+        # producer thread
+        buffer.write(pcm_frames)
+        # consumer thread
+        for window in buffer.windows(16000 * 5, hop=16000 * 4):
+            asr.transcribe_audio_data(window, 16000)
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity (int): Maximum number of unread samples held at once
+            dtype: numpy dtype of the stored samples (float32 by default)
+        """
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got {capacity}")
+
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+
+        # Monotonic sample counters; the producer owns _write_pos and the
+        # consumer owns _read_pos
+        self._write_pos = 0
+        self._read_pos = 0
+
+        # Overrun: samples dropped because the consumer fell behind
+        # Underrun: reads requested before enough samples were available
+        self.overruns = 0
+        self.overrun_samples = 0
+        self.underruns = 0
+
+    @property
+    def available(self):
+        """Number of unread samples currently in the buffer."""
+        return self._write_pos - self._read_pos
+
+    @property
+    def free(self):
+        """Number of samples that can be written without an overrun."""
+        return self.capacity - self.available
+
+    def write(self, frames):
+        """
+        Write PCM frames into the buffer (producer side).
+
+        Samples that do not fit are dropped and counted as an overrun, so the
+        consumer never sees a window that is being overwritten.
+
+        Args:
+            frames (np.ndarray): 1-D array of samples
+
+        Returns:
+            int: Number of samples actually written
+        """
+        frames = np.asarray(frames, dtype=self.dtype).reshape(-1)
+        count = min(len(frames), self.free)
+
+        if count < len(frames):
+            self.overruns += 1
+            self.overrun_samples += len(frames) - count
+
+        if count == 0:
+            return 0
+
+        start = self._write_pos % self.capacity
+        first = min(count, self.capacity - start)
+
+        # Mirror every sample into both halves of the backing array
+        self._data[start:start + first] = frames[:first]
+        self._data[start + self.capacity:start + self.capacity + first] = frames[:first]
+        if first < count:
+            rest = count - first
+            self._data[:rest] = frames[first:count]
+            self._data[self.capacity:self.capacity + rest] = frames[first:count]
+
+        # Publish only after the samples are in place
+        self._write_pos += count
+        return count
+
+    def peek(self, size):
+        """
+        Return a view of the next ``size`` unread samples without consuming them.
+
+        Args:
+            size (int): Window length in samples (at most ``capacity``)
+
+        Returns:
+            np.ndarray or None: Read-only view, or None on underrun
+        """
+        if size > self.capacity:
+            raise ValueError(f"Window size {size} exceeds buffer capacity {self.capacity}")
+
+        if self.available < size:
+            self.underruns += 1
+            return None
+
+        start = self._read_pos % self.capacity
+        view = self._data[start:start + size]
+        view.flags.writeable = False
+        return view
+
+    def advance(self, count):
+        """
+        Mark ``count`` samples as consumed, freeing space for the producer.
+
+        Args:
+            count (int): Number of samples to consume
+        """
+        if count > self.available:
+            raise ValueError(f"Cannot advance {count} samples, only {self.available} available")
+        self._read_pos += count
+
+    def windows(self, size, hop=None):
+        """
+        Yield consecutive windows while enough audio is buffered.
+
+        Each window is a view; the buffer advances by ``hop`` samples once the
+        consumer asks for the next window, so overlapping windows share memory.
+
+        Args:
+            size (int): Window length in samples
+            hop (int): Step between windows (defaults to ``size``, no overlap)
+
+        Yields:
+            np.ndarray: Read-only view of ``size`` samples
+        """
+        if size > self.capacity:
+            raise ValueError(f"Window size {size} exceeds buffer capacity {self.capacity}")
+        hop = size if hop is None else hop
+        if hop <= 0 or hop > size:
+            raise ValueError(f"Hop must be in (0, {size}], got {hop}")
+
+        # Stopping once the buffer is drained is the normal end, not an underrun
+        while self.available >= size:
+            yield self.peek(size)
+            self.advance(hop)
+
+    def stats(self):
+        """
+        Return buffer health counters.
+
+        Returns:
+            dict: Capacity, fill level, overrun and underrun counts
+        """
+        return {
+            "capacity": self.capacity,
+            "available": self.available,
+            "overruns": self.overruns,
+            "overrun_samples": self.overrun_samples,
+            "underruns": self.underruns,
+        }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Streaming Audio Reader - Block-wise reading of very large recordings
+Keeps peak memory bounded by the window size instead of the file size
+"""
+
+import soundfile as sf
+import numpy as np
+
+# Whisper models look at 30 second windows, so larger chunks are truncated
+DEFAULT_CHUNK_SECONDS = 30.0
+
+
+def get_audio_info(audio_path):
+    """
+    Read the header of an audio file without loading any samples.
+
+    Args:
+        audio_path (str): Path to a WAV/FLAC (or other libsndfile) file
+
+    Returns:
+        dict: Sampling rate, channel count, frame count and duration in seconds
+    """
+    info = sf.info(audio_path)
+    return {
+        "sampling_rate": info.samplerate,
+        "channels": info.channels,
+        "frames": info.frames,
+        "duration": info.duration,
+    }
+
+
+def stream_audio_chunks(audio_path, chunk_seconds=DEFAULT_CHUNK_SECONDS, overlap_seconds=0.0):
+    """
+    Yield fixed-size mono float32 chunks from an audio file.
+
+    Uses soundfile's block API with a single preallocated buffer, so only one
+    chunk of audio is held in memory at a time. Multi-channel audio is
+    downmixed to mono.
+
+    Note: for mono files the yielded array is a view into the reused read
+    buffer and is only valid until the next chunk is requested. Copy it if it
+    must outlive the iteration step.
+
+    Args:
+        audio_path (str): Path to the audio file
+        chunk_seconds (float): Length of each chunk in seconds
+        overlap_seconds (float): Audio shared between consecutive chunks
+
+    Yields:
+        tuple: (np.ndarray chunk, int sampling_rate)
+    """
+    if chunk_seconds <= 0:
+        raise ValueError(f"chunk_seconds must be positive, got {chunk_seconds}")
+    if overlap_seconds < 0 or overlap_seconds >= chunk_seconds:
+        raise ValueError(f"overlap_seconds must be in [0, {chunk_seconds}), got {overlap_seconds}")
+
+    with sf.SoundFile(audio_path) as audio_file:
+        sampling_rate = audio_file.samplerate
+        blocksize = max(1, int(round(chunk_seconds * sampling_rate)))
+        overlap = int(round(overlap_seconds * sampling_rate))
+
+        # Reused for every block; dtype and layout are fixed by this buffer
+        out = np.empty((blocksize, audio_file.channels), dtype=np.float32)
+
+        for block in audio_file.blocks(overlap=overlap, out=out):
+            if block.shape[1] == 1:
+                chunk = block[:, 0]
+            else:
+                chunk = block.mean(axis=1, dtype=np.float32)
+            yield chunk, sampling_rate
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Decoding Bias - Initial prompts and hotword boosting for domain vocabulary
+Biases Whisper generation toward product names, places and code-mixed terms
+"""
+
+import threading
+from collections import OrderedDict
+
+import torch
+from transformers import LogitsProcessor
+
+# Logit bonus applied to hotword tokens when no per-word boost is given
+DEFAULT_HOTWORD_BOOST = 4.0
+
+# Prompts and hotword sets kept per vocabulary before the oldest is dropped
+DEFAULT_BIASING_CACHE_SIZE = 256
+
+
+class HotwordLogitsProcessor(LogitsProcessor):
+    """
+    Add a logit bonus to tokens that start or continue a hotword.
+
+    Hotwords are stored as a prefix map from token tuples to the tokens that
+    may follow them, so each decoding step costs one dictionary lookup per
+    prefix length and row.
+    """
+
+    def __init__(self, hotword_token_ids):
+        """
+        Initialize the processor.
+
+        Args:
+            hotword_token_ids (list): (token_id_tuple, boost) pairs
+        """
+        self.first_ids = {}
+        self.continuations = {}
+        self.max_prefix = 0
+
+        for token_ids, boost in hotword_token_ids:
+            if not token_ids:
+                continue
+            self.first_ids[token_ids[0]] = max(boost, self.first_ids.get(token_ids[0], 0.0))
+            for i in range(1, len(token_ids)):
+                next_ids = self.continuations.setdefault(tuple(token_ids[:i]), {})
+                next_ids[token_ids[i]] = max(boost, next_ids.get(token_ids[i], 0.0))
+            self.max_prefix = max(self.max_prefix, len(token_ids) - 1)
+
+        self._first_index = torch.tensor(list(self.first_ids.keys()), dtype=torch.long)
+        self._first_boost = torch.tensor(list(self.first_ids.values()), dtype=torch.float32)
+
+    def __call__(self, input_ids, scores):
+        """
+        Boost hotword tokens in the next-token scores.
+
+        Args:
+            input_ids (torch.LongTensor): (batch, sequence) tokens generated so far
+            scores (torch.FloatTensor): (batch, vocab) next-token logits
+
+        Returns:
+            torch.FloatTensor: Biased scores
+        """
+        if len(self.first_ids) == 0:
+            return scores
+
+        scores = scores.clone()
+        index = self._first_index.to(scores.device)
+        scores[:, index] += self._first_boost.to(scores.device, scores.dtype)
+
+        if self.max_prefix:
+            history = input_ids[:, -self.max_prefix:].tolist()
+            for row, tokens in enumerate(history):
+                for length in range(1, len(tokens) + 1):
+                    next_ids = self.continuations.get(tuple(tokens[-length:]))
+                    if next_ids:
+                        for token_id, boost in next_ids.items():
+                            scores[row, token_id] += boost
+        return scores
+
+
+class BiasingCache:
+    """
+    Tokenization cache for prompts and hotwords of one tokenizer vocabulary.
+
+    Repeated prompts and hotword lists are tokenized once; later requests
+    reuse the cached token ids and logits processor. Both caches are LRU
+    bounded, so arbitrary per-request prompts cannot grow memory without limit.
+    """
+
+    def __init__(self, processor, capacity=DEFAULT_BIASING_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            processor: Whisper processor providing get_prompt_ids and the tokenizer
+            capacity (int): Maximum number of prompts and of hotword sets kept
+        """
+        if capacity < 1:
+            raise ValueError("Biasing cache capacity must be at least 1")
+
+        self.processor = processor
+        self.capacity = capacity
+        self._prompts = OrderedDict()
+        self._hotwords = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, entries, key):
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def _store(self, entries, key, value):
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.capacity:
+                entries.popitem(last=False)
+
+    def prompt_ids(self, prompt):
+        """
+        Return the Whisper prompt ids for a text prompt.
+
+        Args:
+            prompt (str): Initial prompt text
+
+        Returns:
+            torch.LongTensor: Prompt token ids
+        """
+        prompt_ids = self._lookup(self._prompts, prompt)
+        if prompt_ids is None:
+            prompt_ids = self.processor.get_prompt_ids(prompt, return_tensors="pt")
+            self._store(self._prompts, prompt, prompt_ids)
+        return prompt_ids
+
+    def hotword_processor(self, hotwords):
+        """
+        Return a logits processor boosting the given hotwords.
+
+        Args:
+            hotwords (list or dict): Hotword strings, or a mapping of hotword to boost
+
+        Returns:
+            HotwordLogitsProcessor: Cached processor for this hotword set
+        """
+        if not isinstance(hotwords, dict):
+            hotwords = {word: DEFAULT_HOTWORD_BOOST for word in hotwords}
+        key = tuple(sorted(hotwords.items()))
+
+        hotword_processor = self._lookup(self._hotwords, key)
+        if hotword_processor is None:
+            tokenizer = self.processor.tokenizer
+            token_ids = []
+            for word, boost in key:
+                # Words can appear mid-sentence (leading space) or at the start
+                for variant in (" " + word, word):
+                    ids = tokenizer(variant, add_special_tokens=False).input_ids
+                    token_ids.append((tuple(ids), float(boost)))
+            hotword_processor = HotwordLogitsProcessor(token_ids)
+            self._store(self._hotwords, key, hotword_processor)
+        return hotword_processor
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_biasing_cache(processor):
+    """
+    Return the shared biasing cache for a processor's vocabulary.
+
+    Instances loading the same model share one cache.
+
+    Args:
+        processor: Whisper processor
+
+    Returns:
+        BiasingCache: Cache keyed by tokenizer name and vocabulary size
+    """
+    tokenizer = processor.tokenizer
+    key = (getattr(tokenizer, "name_or_path", ""), len(tokenizer))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = BiasingCache(processor)
+        return _caches[key]
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Cancellation - Request deadlines and cooperative cancellation for IndicASR
+Checked between decode steps so abandoned work stops generating immediately
+"""
+
+import time
+import threading
+
+import torch
+from transformers import StoppingCriteria
+
+CANCELLED_MESSAGE = "Error: Transcription cancelled"
+DEADLINE_MESSAGE = "Error: Transcription deadline exceeded"
+
+# IndicASR reports every failure as text starting with one of these; callers
+# use them to keep failures out of transcripts and scores
+ERROR_PREFIXES = ("Error:", "An error occurred")
+
+
+class CancellationToken:
+    """
+    Thread-safe flag a client sets when it no longer needs a result.
+
+    Example:
+        token = CancellationToken()
+        future = lanes.submit(audio, 16000, cancel_token=token)
+        token.cancel()  # client disconnected
+    """
+
+    def __init__(self):
+        """
+        Initialize an uncancelled token.
+        """
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Request cancellation of the work holding this token.
+        """
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """True once cancel() has been called."""
+        return self._event.is_set()
+
+
+def deadline_from_timeout(timeout):
+    """
+    Convert a relative timeout into an absolute monotonic deadline.
+
+    Args:
+        timeout (float): Seconds from now, or None for no deadline
+
+    Returns:
+        float or None: time.monotonic() value after which work should stop
+    """
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def is_expired(deadline):
+    """
+    Check whether a monotonic deadline has passed.
+
+    Args:
+        deadline (float): Absolute deadline or None
+
+    Returns:
+        bool: True if the deadline is set and in the past
+    """
+    return deadline is not None and time.monotonic() >= deadline
+
+
+class CancellationStoppingCriteria(StoppingCriteria):
+    """
+    End a generate call as soon as a batch member is cancelled or the deadline passes.
+
+    generate cannot remove rows from a running batch, so a cancellation ends
+    the decode step for every row. The caller then calls generate again for
+    the surviving members only, continuing each from the prefix recorded
+    here (see continue_generation), so a cancelled member stops costing
+    compute at once. Rows expanded for beam search are mapped back to their
+    batch member, and survivors continue from their best running beam.
+    """
+
+    def __init__(self, cancel_tokens, deadline=None, eos_token_id=None, pad_token_id=None):
+        """
+        Initialize the criteria.
+
+        Args:
+            cancel_tokens (list): CancellationToken or None per batch member
+            deadline (float): Absolute time.monotonic() deadline for the whole batch
+            eos_token_id (int or list): End-of-sequence id(s)
+            pad_token_id (int): Padding id generate appends to rows of finished
+                members; with eos_token_id it identifies members that already
+                finished, which are neither cancelled nor stopped
+        """
+        self.cancel_tokens = list(cancel_tokens)
+        self.deadline = deadline
+        if isinstance(eos_token_id, int):
+            eos_token_id = [eos_token_id]
+        self.finished_token_ids = list(eos_token_id or [])
+        if pad_token_id is not None and self.finished_token_ids:
+            self.finished_token_ids.append(pad_token_id)
+
+        # Members cancelled, and members cut off by the deadline, before finishing
+        self.cancelled = set()
+        self.stopped = set()
+        # Per-member finished flags and the decoder rows at the last step
+        self.finished = [False] * len(self.cancel_tokens)
+        self.input_ids = None
+        self._first_length = None
+
+    @property
+    def generated_tokens(self):
+        """Tokens generated by the call so far."""
+        if self.input_ids is None:
+            return 0
+        return self.input_ids.shape[1] - self._first_length + 1
+
+    def __call__(self, input_ids, scores, **kwargs):
+        """
+        Evaluate the stop condition after a decode step.
+
+        Args:
+            input_ids (torch.LongTensor): (rows, sequence) tokens generated so far
+            scores (torch.FloatTensor): Next-token scores (unused)
+
+        Returns:
+            torch.BoolTensor: True for every row when generation should end
+        """
+        members = len(self.cancel_tokens)
+        rows_per_member = max(1, input_ids.shape[0] // max(members, 1))
+
+        # A member is finished once all of its rows end in end-of-sequence or
+        # padding; running beams never end in EOS, but beam search pads the
+        # beams of members whose search is done
+        if self.finished_token_ids:
+            finished_ids = torch.tensor(self.finished_token_ids, device=input_ids.device)
+            row_finished = torch.isin(input_ids[:, -1], finished_ids)
+            self.finished = row_finished.view(members, rows_per_member).all(dim=1).tolist()
+
+        self.input_ids = input_ids
+        if self._first_length is None:
+            self._first_length = input_ids.shape[1]
+
+        newly_cancelled = [
+            member for member, token in enumerate(self.cancel_tokens)
+            if token is not None and token.cancelled
+            and not self.finished[member] and member not in self.cancelled
+        ]
+        self.cancelled.update(newly_cancelled)
+
+        expired = is_expired(self.deadline)
+        if expired:
+            self.stopped.update(
+                member for member in range(members)
+                if not self.finished[member] and member not in self.cancelled
+            )
+
+        stop = expired or bool(newly_cancelled)
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+    def survivor_prefixes(self, survivors):
+        """
+        Return the decoder rows to continue the given members from.
+
+        Args:
+            survivors (list): Member positions still decoding
+
+        Returns:
+            torch.LongTensor: (len(survivors), sequence) prefixes, the best beam of each member
+        """
+        rows_per_member = self.input_ids.shape[0] // len(self.cancel_tokens)
+        return self.input_ids[[member * rows_per_member for member in survivors]]
+
+
+def continue_generation(sequence, prefix, decoder_start_token_id):
+    """
+    Rebuild a member's full output after generation was resumed from a prefix.
+
+    Depending on the transformers version, generate returns continued rows
+    with or without the decoder_input_ids they started from; the prefix is
+    put back when missing, and any prompt before the start-of-transcript
+    token is dropped, as Whisper does for its own output.
+
+    Args:
+        sequence (torch.LongTensor): Row returned by generate
+        prefix (torch.LongTensor): decoder_input_ids row the call started from, or None
+        decoder_start_token_id (int): Start-of-transcript token id
+
+    Returns:
+        torch.LongTensor: Token ids to decode
+    """
+    if prefix is not None:
+        starts_with_prefix = len(sequence) >= len(prefix) and torch.equal(sequence[:len(prefix)], prefix)
+        if not starts_with_prefix:
+            sequence = torch.cat([prefix, sequence])
+        if decoder_start_token_id is not None:
+            start = (sequence == decoder_start_token_id).nonzero()
+            if len(start):
+                sequence = sequence[start[0, 0]:]
+    return sequence
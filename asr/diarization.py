@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Speaker Diarization - Split multi-speaker audio into per-speaker turns before ASR
+Energy VAD, batched spectral embeddings and incremental speaker clustering
+"""
+
+import numpy as np
+
+from cancellation import ERROR_PREFIXES
+
+
+def frame_signal(audio_data, frame_length, hop_length):
+    """
+    Split a 1-D signal into overlapping frames without copying.
+
+    Args:
+        audio_data (np.ndarray): 1-D audio signal
+        frame_length (int): Samples per frame
+        hop_length (int): Samples between frame starts
+
+    Returns:
+        np.ndarray: Read-only (num_frames, frame_length) view
+    """
+    if len(audio_data) < frame_length:
+        return np.zeros((0, frame_length), dtype=audio_data.dtype)
+    windows = np.lib.stride_tricks.sliding_window_view(audio_data, frame_length)
+    return windows[::hop_length]
+
+
+def detect_speech_segments(audio_data, sampling_rate, frame_ms=30, threshold_db=-35.0,
+                           floor_db=-60.0, min_speech_ms=250, min_silence_ms=300):
+    """
+    Find speech regions with a vectorized energy voice activity detector.
+
+    The threshold is relative to the loudest frame, so it adapts to the
+    recording level; frames below the absolute floor are never speech.
+
+    Args:
+        audio_data (np.ndarray): 1-D audio signal
+        sampling_rate (int): Sampling rate of the audio
+        frame_ms (int): Analysis frame length in milliseconds
+        threshold_db (float): Speech threshold relative to the peak frame energy
+        floor_db (float): Absolute energy floor in dBFS
+        min_speech_ms (int): Shorter speech regions are discarded
+        min_silence_ms (int): Shorter pauses are bridged
+
+    Returns:
+        list: (start_sample, end_sample) tuples
+    """
+    frame_length = max(1, int(sampling_rate * frame_ms / 1000))
+    frames = frame_signal(np.asarray(audio_data, dtype=np.float32), frame_length, frame_length)
+    if len(frames) == 0:
+        return []
+
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    voiced = (energy_db > energy_db.max() + threshold_db) & (energy_db > floor_db)
+
+    # Run boundaries of the voiced mask
+    edges = np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_gap = int(np.ceil(min_silence_ms / frame_ms))
+    min_run = int(np.ceil(min_speech_ms / frame_ms))
+
+    segments = []
+    for start, end in zip(starts, ends):
+        if segments and start - segments[-1][1] < min_gap:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+
+    return [
+        (int(start) * frame_length, min(int(end) * frame_length, len(audio_data)))
+        for start, end in segments
+        if end - start >= min_run
+    ]
+
+
+def mel_filterbank(sampling_rate, n_fft, n_mels):
+    """
+    Build a triangular mel filterbank matrix.
+
+    Args:
+        sampling_rate (int): Sampling rate of the audio
+        n_fft (int): FFT size
+        n_mels (int): Number of mel bands
+
+    Returns:
+        np.ndarray: (n_mels, n_fft // 2 + 1) filterbank
+    """
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0.0), hz_to_mel(sampling_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sampling_rate).astype(int)
+
+    filterbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            filterbank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filterbank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filterbank
+
+
+class SpectralEmbedder:
+    """
+    Lightweight speaker embedding from log-mel statistics.
+
+    Windows are padded to a common length and processed as one batch of FFTs.
+    Any callable taking (list_of_windows, sampling_rate) and returning an
+    (N, D) array can be used in its place, e.g. a neural speaker encoder.
+    """
+
+    def __init__(self, sampling_rate=16000, n_fft=512, hop_ms=10, n_mels=40):
+        """
+        Initialize the embedder.
+
+        Args:
+            sampling_rate (int): Sampling rate of the audio
+            n_fft (int): FFT size
+            hop_ms (int): Hop between STFT frames in milliseconds
+            n_mels (int): Number of mel bands
+        """
+        self.sampling_rate = sampling_rate
+        self.n_fft = n_fft
+        self.hop_length = int(sampling_rate * hop_ms / 1000)
+        self.window = np.hanning(n_fft).astype(np.float32)
+        self.filterbank = mel_filterbank(sampling_rate, n_fft, n_mels)
+
+    def __call__(self, windows, sampling_rate):
+        """
+        Embed a batch of audio windows.
+
+        Args:
+            windows (list): List of 1-D np.ndarray windows
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            np.ndarray: (len(windows), 2 * n_mels) L2-normalized embeddings
+        """
+        if sampling_rate != self.sampling_rate:
+            raise ValueError(f"Expected {self.sampling_rate} Hz audio, got {sampling_rate} Hz")
+
+        max_length = max(self.n_fft, max(len(window) for window in windows))
+        batch = np.zeros((len(windows), max_length), dtype=np.float32)
+        lengths = np.zeros(len(windows), dtype=int)
+        for i, window in enumerate(windows):
+            batch[i, :len(window)] = window
+            lengths[i] = max(1, 1 + (len(window) - self.n_fft) // self.hop_length)
+
+        frames = np.lib.stride_tricks.sliding_window_view(batch, self.n_fft, axis=1)[:, ::self.hop_length]
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=-1)) ** 2
+        log_mel = np.log(spectrum @ self.filterbank.T + 1e-6)
+
+        # Mean and standard deviation over the valid frames of each window
+        mask = (np.arange(log_mel.shape[1])[None, :] < lengths[:, None])[..., None]
+        count = lengths[:, None].astype(np.float32)
+        mean = (log_mel * mask).sum(axis=1) / count
+        std = np.sqrt((((log_mel - mean[:, None, :]) ** 2) * mask).sum(axis=1) / count)
+
+        embeddings = np.concatenate([mean - mean.mean(axis=1, keepdims=True), std], axis=1)
+        return embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-10)
+
+
+class OnlineSpeakerClustering:
+    """
+    Incremental speaker clustering over embeddings.
+
+    Each embedding is compared against running speaker centroids with a single
+    matrix product; it joins the closest speaker above the similarity threshold
+    or starts a new one. Cost is O(speakers) per embedding and the clusters can
+    be updated as new audio arrives.
+    """
+
+    def __init__(self, threshold=0.75, max_speakers=None):
+        """
+        Initialize the clustering state.
+
+        Args:
+            threshold (float): Minimum cosine similarity to join an existing speaker
+            max_speakers (int): Optional cap; once reached, embeddings join the closest speaker
+        """
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.centroids = None
+        self.counts = []
+
+    @property
+    def num_speakers(self):
+        """Number of speakers discovered so far."""
+        return len(self.counts)
+
+    def assign(self, embeddings):
+        """
+        Assign a batch of embeddings to speakers, updating the centroids.
+
+        Args:
+            embeddings (np.ndarray): (N, D) L2-normalized embeddings
+
+        Returns:
+            list: Speaker index per embedding
+        """
+        labels = []
+        for embedding in np.atleast_2d(embeddings):
+            if self.centroids is None:
+                self.centroids = embedding[None, :].copy()
+                self.counts = [1]
+                labels.append(0)
+                continue
+
+            normalized = self.centroids / np.linalg.norm(self.centroids, axis=1, keepdims=True)
+            similarity = normalized @ embedding
+            best = int(np.argmax(similarity))
+
+            at_capacity = self.max_speakers is not None and self.num_speakers >= self.max_speakers
+            if similarity[best] >= self.threshold or at_capacity:
+                # Running mean of the speaker's embeddings
+                self.counts[best] += 1
+                self.centroids[best] += (embedding - self.centroids[best]) / self.counts[best]
+                labels.append(best)
+            else:
+                self.centroids = np.vstack([self.centroids, embedding])
+                self.counts.append(1)
+                labels.append(self.num_speakers - 1)
+        return labels
+
+
+class SpeakerDiarizer:
+    """
+    Diarization pipeline: VAD segments -> batched embeddings -> online clustering.
+    """
+
+    def __init__(self, sampling_rate=16000, window_seconds=1.5, batch_size=64,
+                 threshold=0.75, max_speakers=None, embedder=None):
+        """
+        Initialize the diarizer.
+
+        Args:
+            sampling_rate (int): Sampling rate of the audio
+            window_seconds (float): Speech is embedded in windows of this length
+            batch_size (int): Number of windows embedded per batch
+            threshold (float): Cosine similarity threshold for clustering
+            max_speakers (int): Optional upper bound on the number of speakers
+            embedder (callable): Custom embedding function (defaults to SpectralEmbedder)
+        """
+        self.sampling_rate = sampling_rate
+        self.window_length = int(window_seconds * sampling_rate)
+        self.batch_size = batch_size
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.embedder = embedder or SpectralEmbedder(sampling_rate)
+
+    def diarize(self, audio_data, sampling_rate):
+        """
+        Split audio into speaker turns.
+
+        Args:
+            audio_data (np.ndarray): 1-D audio signal
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            list: Turn dicts with 'speaker', 'start' and 'end' (in samples)
+        """
+        if sampling_rate != self.sampling_rate:
+            raise ValueError(f"Expected {self.sampling_rate} Hz audio, got {sampling_rate} Hz")
+
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+
+        # Cut speech segments into embedding windows; a short tail joins the previous window
+        windows = []
+        for start, end in detect_speech_segments(audio_data, sampling_rate):
+            bounds = list(range(start, end, self.window_length)) + [end]
+            if len(bounds) > 2 and bounds[-1] - bounds[-2] < self.window_length // 2:
+                del bounds[-2]
+            windows.extend(zip(bounds[:-1], bounds[1:]))
+
+        clustering = OnlineSpeakerClustering(self.threshold, self.max_speakers)
+        labels = []
+        for i in range(0, len(windows), self.batch_size):
+            batch = windows[i:i + self.batch_size]
+            embeddings = self.embedder([audio_data[start:end] for start, end in batch], sampling_rate)
+            labels.extend(clustering.assign(embeddings))
+
+        # Merge adjacent windows of the same speaker into turns
+        turns = []
+        for (start, end), speaker in zip(windows, labels):
+            if turns and turns[-1]["speaker"] == speaker and start == turns[-1]["end"]:
+                turns[-1]["end"] = end
+            else:
+                turns.append({"speaker": speaker, "start": start, "end": end})
+        return turns
+
+
+def transcribe_speakers(asr, audio_data, sampling_rate, diarizer=None, batch_size=8,
+                        max_segment_seconds=30.0):
+    """
+    Diarize audio and transcribe each speaker turn with IndicASR in batches.
+
+    Turns longer than the model window are split, transcribed and joined again.
+    Each returned turn is independent, so downstream translation can run on
+    turns in parallel.
+
+    Args:
+        asr (IndicASR): Loaded ASR model
+        audio_data (np.ndarray): 1-D audio signal
+        sampling_rate (int): Sampling rate of the audio
+        diarizer (SpeakerDiarizer): Diarizer to use (a default one is created if None)
+        batch_size (int): Number of segments per transcribe_batch call
+        max_segment_seconds (float): Longest segment sent to the model
+
+    Returns:
+        list: Turn dicts with 'speaker', 'start', 'end' (seconds), 'text' and
+            'error' (the first failure reported for the turn, or None)
+    """
+    diarizer = diarizer or SpeakerDiarizer(sampling_rate)
+    turns = diarizer.diarize(audio_data, sampling_rate)
+
+    max_length = int(max_segment_seconds * sampling_rate)
+    pieces = []
+    for index, turn in enumerate(turns):
+        for start in range(turn["start"], turn["end"], max_length):
+            pieces.append((index, audio_data[start:min(start + max_length, turn["end"])]))
+
+    texts = [[] for _ in turns]
+    errors = [None] * len(turns)
+    for i in range(0, len(pieces), batch_size):
+        batch = pieces[i:i + batch_size]
+        results = asr.transcribe_batch([segment for _, segment in batch], sampling_rate)
+        for (index, _), text in zip(batch, results):
+            # Failures are reported per turn, never as the speaker's words
+            if text.startswith(ERROR_PREFIXES):
+                errors[index] = errors[index] or text
+            else:
+                texts[index].append(text.strip())
+
+    return [
+        {
+            "speaker": f"SPEAKER_{turn['speaker']:02d}",
+            "start": turn["start"] / sampling_rate,
+            "end": turn["end"] / sampling_rate,
+            "text": " ".join(text for text in texts[index] if text),
+            "error": errors[index],
+        }
+        for index, turn in enumerate(turns)
+    ]
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+ASR Evaluation - Offline WER/CER scoring of IndicASR against reference transcripts
+Runs transcription and scoring across a process pool and reports accuracy with latency
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from cancellation import ERROR_PREFIXES
+
+# Devanagari, Tamil and Gujarati digits map to ASCII so "१०" and "10" compare equal
+NATIVE_DIGITS = {}
+for zero in (0x0966, 0x0BE6, 0x0AE6):
+    for value in range(10):
+        NATIVE_DIGITS[zero + value] = str(value)
+
+# Zero-width joiners/non-joiners change rendering, not the word
+ZERO_WIDTH = {0x200B: None, 0x200C: None, 0x200D: None, 0xFEFF: None}
+
+
+def normalize_text(text):
+    """
+    Normalize a transcript for Indic-aware WER/CER scoring.
+
+    Applies NFC (which also decomposes the composition-excluded nukta letters
+    consistently), removes zero-width characters and punctuation including the
+    danda, maps native digits to ASCII, lowercases Latin script and collapses
+    whitespace.
+
+    Args:
+        text (str): Raw transcript
+
+    Returns:
+        str: Normalized transcript
+    """
+    text = unicodedata.normalize("NFC", text).translate(ZERO_WIDTH).translate(NATIVE_DIGITS)
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.lower().split())
+
+
+def edit_distance(reference, hypothesis):
+    """
+    Levenshtein distance between two sequences.
+
+    Uses the bit-parallel algorithm of Myers/Hyyrö on Python integers, so the
+    cost is O(len(hypothesis)) big-integer operations instead of an
+    O(len(reference) * len(hypothesis)) table.
+
+    Args:
+        reference (sequence): Reference tokens (characters or words)
+        hypothesis (sequence): Hypothesis tokens
+
+    Returns:
+        int: Minimum number of substitutions, insertions and deletions
+    """
+    if len(reference) == 0:
+        return len(hypothesis)
+    if len(hypothesis) == 0:
+        return len(reference)
+
+    # Bit mask of the reference positions holding each token
+    match_masks = {}
+    for i, token in enumerate(reference):
+        match_masks[token] = match_masks.get(token, 0) | (1 << i)
+
+    length = len(reference)
+    mask = (1 << length) - 1
+    high_bit = 1 << (length - 1)
+    positive, negative = mask, 0
+    distance = length
+
+    for token in hypothesis:
+        match = match_masks.get(token, 0)
+        vertical = match | negative
+        horizontal = ((((match & positive) + positive) & mask) ^ positive) | match
+        horizontal_positive = negative | (~(horizontal | positive) & mask)
+        horizontal_negative = positive & horizontal
+
+        if horizontal_positive & high_bit:
+            distance += 1
+        elif horizontal_negative & high_bit:
+            distance -= 1
+
+        horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & mask)
+        negative = horizontal_positive & vertical
+
+    return distance
+
+
+def score_transcript(reference, hypothesis):
+    """
+    Count word and character errors for one utterance.
+
+    Args:
+        reference (str): Reference transcript
+        hypothesis (str): ASR output
+
+    Returns:
+        dict: Error and length counts for WER and CER
+    """
+    reference = normalize_text(reference)
+    hypothesis = normalize_text(hypothesis)
+    reference_words = reference.split()
+
+    return {
+        "word_errors": edit_distance(reference_words, hypothesis.split()),
+        "words": len(reference_words),
+        "char_errors": edit_distance(reference.replace(" ", ""), hypothesis.replace(" ", "")),
+        "chars": len(reference.replace(" ", "")),
+    }
+
+
+def load_manifest(manifest_path):
+    """
+    Load an evaluation manifest.
+
+    JSON-lines manifests use 'audio_filepath' and 'text' fields (NeMo style);
+    any other file is read as tab-separated 'path<TAB>transcript' lines.
+    Relative audio paths are resolved against the manifest directory.
+
+    Args:
+        manifest_path (str): Path to the manifest
+
+    Returns:
+        list: Dicts with 'audio_filepath' and 'text'
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    with open(manifest_path, "r", encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line:
+                continue
+            if manifest_path.endswith((".json", ".jsonl")):
+                record = json.loads(line)
+                entry = {"audio_filepath": record["audio_filepath"], "text": record["text"]}
+            else:
+                path, text = line.split("\t", 1)
+                entry = {"audio_filepath": path, "text": text}
+            entry["audio_filepath"] = os.path.join(base_dir, entry["audio_filepath"])
+            entries.append(entry)
+    return entries
+
+
+# One model per worker process, created by _init_worker
+_worker_asr = None
+
+
+def _init_worker(language, weights_path, num_threads):
+    """
+    Load IndicASR once in each worker process with its share of the cores.
+    """
+    global _worker_asr
+    import torch
+    from Demo_ASR_model import IndicASR
+
+    # Without this every worker uses all cores and latency measures oversubscription
+    torch.set_num_threads(num_threads)
+    _worker_asr = IndicASR(language=language, weights_path=weights_path)
+
+
+def _evaluate_entry(entry):
+    """
+    Transcribe and score one manifest entry inside a worker process.
+    """
+    start = time.perf_counter()
+    hypothesis = _worker_asr.transcribe(entry["audio_filepath"])
+    latency = time.perf_counter() - start
+
+    result = dict(entry)
+    result["hypothesis"] = hypothesis
+    result["latency"] = latency
+    result["failed"] = hypothesis.startswith(ERROR_PREFIXES)
+    if result["failed"]:
+        return result
+
+    result["duration"] = sf.info(entry["audio_filepath"]).duration
+    result.update(score_transcript(entry["text"], hypothesis))
+    return result
+
+
+def summarize(results):
+    """
+    Aggregate per-utterance results into corpus-level accuracy and latency.
+
+    Failed utterances are counted separately and excluded from the accuracy
+    and latency figures.
+
+    Args:
+        results (list): Dicts produced by scoring each utterance
+
+    Returns:
+        dict: WER, CER, latency percentiles, real-time factor and failure count
+    """
+    failed = [result for result in results if result.get("failed")]
+    results = [result for result in results if not result.get("failed")]
+    words = sum(result["words"] for result in results)
+    chars = sum(result["chars"] for result in results)
+    latencies = np.array([result["latency"] for result in results])
+    duration = sum(result["duration"] for result in results)
+
+    return {
+        "utterances": len(results),
+        "failed": len(failed),
+        "wer": sum(result["word_errors"] for result in results) / max(words, 1),
+        "cer": sum(result["char_errors"] for result in results) / max(chars, 1),
+        "latency_mean": float(latencies.mean()) if len(results) else 0.0,
+        "latency_p50": float(np.percentile(latencies, 50)) if len(results) else 0.0,
+        "latency_p95": float(np.percentile(latencies, 95)) if len(results) else 0.0,
+        "real_time_factor": float(latencies.sum() / duration) if duration else 0.0,
+    }
+
+
+def evaluate(manifest_path, language="hi", num_workers=1, weights_path=None):
+    """
+    Run IndicASR over a manifest and score it.
+
+    Args:
+        manifest_path (str): Evaluation manifest
+        language (str): Language code of the model to evaluate
+        num_workers (int): Number of worker processes (each loads the model,
+            unless weights_path points at shared mmap-ed weights); the
+            available cores are divided between them
+        weights_path (str): Optional safetensors file from shared_weights.export_weights
+
+    Returns:
+        tuple: (summary dict, list of per-utterance results)
+    """
+    entries = load_manifest(manifest_path)
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    num_threads = max(1, cores // num_workers)
+
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_init_worker,
+        initargs=(language, weights_path, num_threads),
+    ) as executor:
+        results = list(executor.map(_evaluate_entry, entries))
+    return summarize(results), results
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate IndicASR WER/CER and latency on a manifest")
+    parser.add_argument("manifest", help="JSON-lines or TSV manifest of audio paths and references")
+    parser.add_argument("--language", default="hi", help="Language code: hi, ta or gu")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--weights-path", default=None, help="Shared mmap-ed safetensors weights")
+    parser.add_argument("--output", default=None, help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifest):
+        print(f"Error: Manifest not found at {args.manifest}")
+        sys.exit(1)
+
+    summary, results = evaluate(args.manifest, args.language, args.workers, args.weights_path)
+
+    print(f"\n=== Evaluation: {args.manifest} ({args.language}) ===")
+    print(f"Utterances:       {summary['utterances']}")
+    print(f"Failed:           {summary['failed']}")
+    print(f"WER:              {summary['wer']:.2%}")
+    print(f"CER:              {summary['cer']:.2%}")
+    print(f"Latency mean:     {summary['latency_mean']:.3f} s")
+    print(f"Latency p50/p95:  {summary['latency_p50']:.3f} / {summary['latency_p95']:.3f} s")
+    print(f"Real-time factor: {summary['real_time_factor']:.3f}")
+
+    for result in results:
+        if result["failed"]:
+            print(f"FAILED {result['audio_filepath']}: {result['hypothesis']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report:
+            json.dump({"summary": summary, "results": results}, report, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
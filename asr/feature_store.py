@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Feature Store - On-disk cache of log-mel features and encoder hidden states
+Lets re-decoding runs over an archive skip feature extraction and the encoder
+"""
+
+import os
+import re
+import hashlib
+import tempfile
+
+import numpy as np
+
+
+class FeatureStore:
+    """
+    Persistent store of per-clip features and encoder outputs.
+
+    Entries are keyed by a hash of the audio samples, the sampling rate and the
+    model id, and saved as float16 ``.npy`` files that are opened with
+    ``mmap_mode='r'``, so reading an entry does not load it into memory until
+    the data is used. Writes go to a temporary file and are renamed into
+    place, so concurrent readers never see partial entries.
+
+    Layout: ``<root>/<model id>/<key[:2]>/<key>.<kind>.npy``
+    """
+
+    KINDS = ("features", "encoder")
+
+    def __init__(self, root_dir, dtype=np.float16):
+        """
+        Initialize the store.
+
+        Args:
+            root_dir (str): Directory holding the store (created if missing)
+            dtype: numpy dtype used on disk (float16 halves the size of float32)
+        """
+        self.root_dir = root_dir
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_data, sampling_rate):
+        """
+        Hash audio samples and their sampling rate.
+
+        Args:
+            audio_data (np.ndarray): Audio samples
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            str: Hex digest identifying the clip
+        """
+        samples = np.ascontiguousarray(audio_data, dtype=np.float32)
+        digest = hashlib.sha256(str(sampling_rate).encode())
+        digest.update(memoryview(samples).cast("B"))
+        return digest.hexdigest()
+
+    def _path(self, model_id, key, kind):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown entry kind: {kind}. Please choose from {list(self.KINDS)}")
+        model_dir = re.sub(r"[^A-Za-z0-9._-]", "_", model_id)
+        return os.path.join(self.root_dir, model_dir, key[:2], f"{key}.{kind}.npy")
+
+    def get(self, model_id, key, kind):
+        """
+        Open a stored entry as a read-only memory map.
+
+        Args:
+            model_id (str): Model the entry was computed with
+            key (str): Clip key from make_key
+            kind (str): 'features' or 'encoder'
+
+        Returns:
+            np.ndarray or None: Memory-mapped array, or None if absent
+        """
+        path = self._path(model_id, key, kind)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.load(path, mmap_mode="r")
+
+    def put(self, model_id, key, kind, array):
+        """
+        Store an entry atomically.
+
+        Args:
+            model_id (str): Model the entry was computed with
+            key (str): Clip key from make_key
+            kind (str): 'features' or 'encoder'
+            array (np.ndarray): Data to store (cast to the store dtype)
+        """
+        path = self._path(model_id, key, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                np.save(temp_file, np.asarray(array, dtype=self.dtype))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def stats(self):
+        """
+        Return cache hit/miss counters.
+
+        Returns:
+            dict: Hits and misses since the store was opened
+        """
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Inference Lanes - Concurrent requests against a single IndicASR instance
+Several worker threads share one set of model weights with tuned torch threading
+"""
+
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+
+class InferenceLanes:
+    """
+    Run transcription requests concurrently on one shared IndicASR model.
+
+    Each lane is a worker thread with its own intra-op thread budget (and
+    optionally its own CPU cores), so N lanes x M threads never oversubscribe
+    the machine. Weights are shared, not copied: the model is put in eval mode
+    and every call runs under ``torch.inference_mode()``, which keeps generate
+    free of shared mutable state.
+
+    Example:
+        asr = IndicASR(language="hi")
+        with InferenceLanes(asr, num_lanes=4, pin_cores=True) as lanes:
+            futures = [lanes.submit(audio, 16000) for audio in requests]
+            results = [future.result() for future in futures]
+    """
+
+    def __init__(self, asr, num_lanes=1, intra_op_threads=None, inter_op_threads=None, pin_cores=False):
+        """
+        Initialize the lanes.
+
+        Args:
+            asr (IndicASR): Loaded ASR model shared by all lanes
+            num_lanes (int): Number of requests processed concurrently
+            intra_op_threads (int): Torch intra-op threads per lane
+                (defaults to available cores divided by the number of lanes)
+            inter_op_threads (int): Process-wide torch inter-op threads
+                (only settable before torch runs any parallel work)
+            pin_cores (bool): Pin each lane to a disjoint set of CPU cores (Linux only)
+        """
+        if num_lanes < 1:
+            raise ValueError(f"num_lanes must be at least 1, got {num_lanes}")
+
+        self.asr = asr
+        self.num_lanes = num_lanes
+        if hasattr(os, "sched_getaffinity"):
+            self.cores = sorted(os.sched_getaffinity(0))
+        else:
+            self.cores = list(range(os.cpu_count() or 1))
+        self.intra_op_threads = intra_op_threads or max(1, len(self.cores) // num_lanes)
+        self.pin_cores = pin_cores and hasattr(os, "sched_setaffinity")
+
+        if inter_op_threads is not None:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError as e:
+                print(f"Could not set inter-op threads to {inter_op_threads}: {e}")
+
+        if hasattr(asr, "model"):
+            asr.model.eval()
+
+        self._lane_ids = itertools.count()
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_lanes,
+            thread_name_prefix="asr-lane",
+            initializer=self._init_lane,
+        )
+
+    def _init_lane(self):
+        """
+        Configure torch threading and CPU affinity for the calling lane thread.
+        """
+        lane_id = next(self._lane_ids)
+
+        # With the OpenMP backend the thread count applies to the calling thread
+        torch.set_num_threads(self.intra_op_threads)
+
+        if self.pin_cores:
+            start = (lane_id * self.intra_op_threads) % len(self.cores)
+            lane_cores = [self.cores[(start + i) % len(self.cores)] for i in range(self.intra_op_threads)]
+            # pid 0 pins only the calling thread on Linux
+            os.sched_setaffinity(0, lane_cores)
+
+    def _run(self, method, *args, **kwargs):
+        """
+        Call an IndicASR method inside the lane with autograd disabled.
+        """
+        with torch.inference_mode():
+            return getattr(self.asr, method)(*args, **kwargs)
+
+    def submit(self, audio_data, sampling_rate, **kwargs):
+        """
+        Queue a transcription of audio data on the next free lane.
+
+        Args:
+            audio_data (np.ndarray): Audio data as numpy array
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            concurrent.futures.Future: Resolves to the transcribed text
+        """
+        return self._executor.submit(self._run, "transcribe_audio_data", audio_data, sampling_rate, **kwargs)
+
+    def submit_batch(self, audio_batch, sampling_rate, **kwargs):
+        """
+        Queue a batched transcription on the next free lane.
+
+        Args:
+            audio_batch (list): List of np.ndarray segments
+            sampling_rate (int): Sampling rate shared by all segments
+
+        Returns:
+            concurrent.futures.Future: Resolves to a list of transcribed texts
+        """
+        return self._executor.submit(self._run, "transcribe_batch", audio_batch, sampling_rate, **kwargs)
+
+    def submit_file(self, audio_path, **kwargs):
+        """
+        Queue a transcription of an audio file on the next free lane.
+
+        Args:
+            audio_path (str): Path to the audio file
+
+        Returns:
+            concurrent.futures.Future: Resolves to the transcribed text
+        """
+        return self._executor.submit(self._run, "transcribe", audio_path, **kwargs)
+
+    def map(self, audio_batch, sampling_rate):
+        """
+        Transcribe many clips concurrently, preserving input order.
+
+        Args:
+            audio_batch (list): List of np.ndarray clips
+            sampling_rate (int): Sampling rate shared by all clips
+
+        Returns:
+            list: Transcribed text per clip
+        """
+        futures = [self.submit(audio_data, sampling_rate) for audio_data in audio_batch]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """
+        Stop the lane threads.
+
+        Args:
+            wait (bool): Wait for queued requests to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Adaptive Load Shedding - Step IndicASR down to cheaper decoding under overload
+Watches queue depth and recent latency and picks a quality tier per request
+"""
+
+import time
+import threading
+from collections import namedtuple
+
+QualityTier = namedtuple("QualityTier", ["name", "num_beams", "max_new_tokens", "quantized"])
+
+# Ordered from best quality to cheapest
+DEFAULT_TIERS = (
+    QualityTier("full", num_beams=4, max_new_tokens=128, quantized=False),
+    QualityTier("greedy", num_beams=1, max_new_tokens=128, quantized=False),
+    QualityTier("short", num_beams=1, max_new_tokens=64, quantized=False),
+    QualityTier("quantized", num_beams=1, max_new_tokens=64, quantized=True),
+)
+
+
+class AdaptiveController:
+    """
+    Choose a decoding tier for each request from current load.
+
+    Load is the larger of the in-flight request count and any queue depth
+    reported by the caller, plus an exponentially weighted average of recent
+    latencies. Above the high watermarks the controller steps one tier
+    cheaper; below the low watermarks it steps one tier back up. A minimum
+    dwell time between changes prevents oscillation.
+
+    Example:
+        controller = AdaptiveController(asr)
+        text, tier = controller.transcribe_audio_data(audio, 16000)
+    """
+
+    def __init__(self, asr, tiers=DEFAULT_TIERS, queue_high=8, queue_low=2,
+                 latency_high=3.0, latency_low=1.0, smoothing=0.2, min_dwell=2.0):
+        """
+        Initialize the controller.
+
+        Args:
+            asr (IndicASR): Model used for transcription
+            tiers (tuple): QualityTier entries from best to cheapest
+            queue_high (int): Queue depth that triggers a step down
+            queue_low (int): Queue depth below which a step up is allowed
+            latency_high (float): Smoothed latency (s) that triggers a step down
+            latency_low (float): Smoothed latency (s) below which a step up is allowed
+            smoothing (float): Weight of the newest latency in the moving average
+            min_dwell (float): Minimum seconds between tier changes
+        """
+        if len(tiers) == 0:
+            raise ValueError("At least one quality tier is required")
+
+        self.asr = asr
+        self.tiers = tuple(tiers)
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.latency_high = latency_high
+        self.latency_low = latency_low
+        self.smoothing = smoothing
+        self.min_dwell = min_dwell
+
+        self.level = 0
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.latency = 0.0
+        self.tier_counts = {tier.name: 0 for tier in self.tiers}
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current_tier(self):
+        """The tier new requests currently receive."""
+        return self.tiers[self.level]
+
+    def observe_queue_depth(self, depth):
+        """
+        Report the number of requests waiting in an external queue.
+
+        Args:
+            depth (int): Current queue length
+        """
+        self.queue_depth = depth
+
+    def _update_level(self, now):
+        """
+        Move one tier down or up if load crossed a watermark (lock held).
+        """
+        if now - self._last_change < self.min_dwell:
+            return
+
+        load = max(self.in_flight, self.queue_depth)
+        overloaded = load > self.queue_high or self.latency > self.latency_high
+        relaxed = load < self.queue_low and self.latency < self.latency_low
+
+        if overloaded and self.level < len(self.tiers) - 1:
+            self.level += 1
+            self._last_change = now
+            print(f"Load shedding: stepping down to tier '{self.current_tier.name}'")
+        elif relaxed and self.level > 0:
+            self.level -= 1
+            self._last_change = now
+            print(f"Load shedding: stepping up to tier '{self.current_tier.name}'")
+
+    def acquire(self):
+        """
+        Register a starting request and return the tier it should use.
+
+        Returns:
+            QualityTier: Tier assigned to the request
+        """
+        with self._lock:
+            self.in_flight += 1
+            self._update_level(time.monotonic())
+            tier = self.current_tier
+            self.tier_counts[tier.name] += 1
+            return tier
+
+    def release(self, latency):
+        """
+        Register a finished request.
+
+        Args:
+            latency (float): Request latency in seconds
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if self.latency == 0.0:
+                self.latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+            self._update_level(time.monotonic())
+
+    def _run(self, method, *args, **kwargs):
+        """
+        Call an IndicASR method with the tier chosen for the current load.
+        """
+        tier = self.acquire()
+        start = time.perf_counter()
+        try:
+            return getattr(self.asr, method)(*args, tier=tier, **kwargs), tier.name
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def transcribe(self, audio_path, **kwargs):
+        """
+        Transcribe an audio file at the current quality tier.
+
+        Args:
+            audio_path (str): Path to the audio file
+
+        Returns:
+            tuple: (transcribed text, tier name)
+        """
+        return self._run("transcribe", audio_path, **kwargs)
+
+    def transcribe_audio_data(self, audio_data, sampling_rate, **kwargs):
+        """
+        Transcribe audio data at the current quality tier.
+
+        Args:
+            audio_data (np.ndarray): Audio data as numpy array
+            sampling_rate (int): Sampling rate of the audio
+
+        Returns:
+            tuple: (transcribed text, tier name)
+        """
+        return self._run("transcribe_audio_data", audio_data, sampling_rate, **kwargs)
+
+    def transcribe_batch(self, audio_batch, sampling_rate, **kwargs):
+        """
+        Transcribe a batch of segments at the current quality tier.
+
+        Args:
+            audio_batch (list): List of np.ndarray segments
+            sampling_rate (int): Sampling rate shared by all segments
+
+        Returns:
+            tuple: (list of transcribed texts, tier name)
+        """
+        return self._run("transcribe_batch", audio_batch, sampling_rate, **kwargs)
+
+    def metrics(self):
+        """
+        Export the controller state for monitoring.
+
+        Returns:
+            dict: Current tier, load signals and per-tier request counts
+        """
+        with self._lock:
+            return {
+                "tier": self.current_tier.name,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "latency": self.latency,
+                "tier_counts": dict(self.tier_counts),
+            }
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Text Post-Processing - Punctuation, number/date normalization and script cleanup
+Rule tables are built once per language and applied to batches of IndicASR outputs
+"""
+
+import re
+import unicodedata
+
+from cancellation import ERROR_PREFIXES
+
+# Spoken number words -> values. Hindi and Gujarati numbers below 100 are
+# irregular, so common forms are listed explicitly; multipliers combine them.
+NUMBER_WORDS = {
+    "hi": {
+        "शून्य": 0, "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6, "छः": 6,
+        "सात": 7, "आठ": 8, "नौ": 9, "दस": 10, "ग्यारह": 11, "बारह": 12, "तेरह": 13, "चौदह": 14,
+        "पंद्रह": 15, "पन्द्रह": 15, "सोलह": 16, "सत्रह": 17, "अठारह": 18, "उन्नीस": 19, "बीस": 20,
+        "इक्कीस": 21, "बाईस": 22, "तेईस": 23, "चौबीस": 24, "पच्चीस": 25, "छब्बीस": 26, "सत्ताईस": 27,
+        "अट्ठाईस": 28, "उनतीस": 29, "तीस": 30, "इकतीस": 31, "बत्तीस": 32, "तैंतीस": 33, "चौंतीस": 34,
+        "पैंतीस": 35, "छत्तीस": 36, "सैंतीस": 37, "अड़तीस": 38, "उनतालीस": 39, "चालीस": 40,
+        "इकतालीस": 41, "बयालीस": 42, "तैंतालीस": 43, "चवालीस": 44, "पैंतालीस": 45, "छियालीस": 46,
+        "सैंतालीस": 47, "अड़तालीस": 48, "उनचास": 49, "पचास": 50, "इक्यावन": 51, "बावन": 52,
+        "तिरेपन": 53, "चौवन": 54, "पचपन": 55, "छप्पन": 56, "सत्तावन": 57, "अट्ठावन": 58, "उनसठ": 59,
+        "साठ": 60, "इकसठ": 61, "बासठ": 62, "तिरसठ": 63, "चौंसठ": 64, "पैंसठ": 65, "छियासठ": 66,
+        "सड़सठ": 67, "अड़सठ": 68, "उनहत्तर": 69, "सत्तर": 70, "इकहत्तर": 71, "बहत्तर": 72,
+        "तिहत्तर": 73, "चौहत्तर": 74, "पचहत्तर": 75, "छिहत्तर": 76, "सतहत्तर": 77, "अठहत्तर": 78,
+        "उन्यासी": 79, "अस्सी": 80, "इक्यासी": 81, "बयासी": 82, "तिरासी": 83, "चौरासी": 84,
+        "पचासी": 85, "छियासी": 86, "सत्तासी": 87, "अट्ठासी": 88, "नवासी": 89, "नब्बे": 90,
+        "इक्यानबे": 91, "बानबे": 92, "तिरानबे": 93, "चौरानबे": 94, "पंचानबे": 95, "छियानबे": 96,
+        "सत्तानबे": 97, "अट्ठानबे": 98, "निन्यानबे": 99,
+        "सौ": 100, "हजार": 1000, "हज़ार": 1000, "लाख": 100000, "करोड़": 10000000,
+    },
+    "ta": {
+        "பூஜ்யம்": 0, "ஒன்று": 1, "இரண்டு": 2, "மூன்று": 3, "நான்கு": 4, "ஐந்து": 5, "ஆறு": 6,
+        "ஏழு": 7, "எட்டு": 8, "ஒன்பது": 9, "பத்து": 10, "பதினொன்று": 11, "பன்னிரண்டு": 12,
+        "பதிமூன்று": 13, "பதினான்கு": 14, "பதினைந்து": 15, "பதினாறு": 16, "பதினேழு": 17,
+        "பதினெட்டு": 18, "பத்தொன்பது": 19, "இருபது": 20, "முப்பது": 30, "நாற்பது": 40,
+        "ஐம்பது": 50, "அறுபது": 60, "எழுபது": 70, "எண்பது": 80, "தொண்ணூறு": 90,
+        "நூறு": 100, "ஆயிரம்": 1000, "லட்சம்": 100000, "கோடி": 10000000,
+    },
+    "gu": {
+        "શૂન્ય": 0, "એક": 1, "બે": 2, "ત્રણ": 3, "ચાર": 4, "પાંચ": 5, "છ": 6, "સાત": 7, "આઠ": 8,
+        "નવ": 9, "દસ": 10, "અગિયાર": 11, "બાર": 12, "તેર": 13, "ચૌદ": 14, "પંદર": 15, "સોળ": 16,
+        "સત્તર": 17, "અઢાર": 18, "ઓગણીસ": 19, "વીસ": 20, "ત્રીસ": 30, "ચાલીસ": 40, "પચાસ": 50,
+        "સાઠ": 60, "સિત્તેર": 70, "એંસી": 80, "નેવું": 90,
+        "સો": 100, "હજાર": 1000, "લાખ": 100000, "કરોડ": 10000000,
+    },
+}
+
+MONTHS = {
+    "hi": ["जनवरी", "फरवरी", "मार्च", "अप्रैल", "मई", "जून",
+           "जुलाई", "अगस्त", "सितंबर", "अक्टूबर", "नवंबर", "दिसंबर"],
+    "ta": ["ஜனவரி", "பிப்ரவரி", "மார்ச்", "ஏப்ரல்", "மே", "ஜூன்",
+           "ஜூலை", "ஆகஸ்ட்", "செப்டம்பர்", "அக்டோபர்", "நவம்பர்", "டிசம்பர்"],
+    "gu": ["જાન્યુઆરી", "ફેબ્રુઆરી", "માર્ચ", "એપ્રિલ", "મે", "જૂન",
+           "જુલાઈ", "ઓગસ્ટ", "સપ્ટેમ્બર", "ઓક્ટોબર", "નવેમ્બર", "ડિસેમ્બર"],
+}
+
+# Common spelling variants mapped to the canonical month names above
+MONTH_VARIANTS = {
+    "hi": {"फ़रवरी": "फरवरी", "सितम्बर": "सितंबर", "अक्तूबर": "अक्टूबर", "नवम्बर": "नवंबर", "दिसम्बर": "दिसंबर"},
+    "ta": {},
+    "gu": {"ઑગસ્ટ": "ઓગસ્ટ", "ઑક્ટોબર": "ઓક્ટોબર"},
+}
+
+ENGLISH_MONTHS = ["january", "february", "march", "april", "may", "june",
+                  "july", "august", "september", "october", "november", "december"]
+
+QUESTION_WORDS = {
+    "hi": {"क्या", "कब", "कहाँ", "कहां", "क्यों", "कैसे", "कैसा", "कैसी", "कौन", "कितना", "कितने", "कितनी"},
+    "ta": {"என்ன", "ஏன்", "எப்போது", "எங்கே", "எப்படி", "யார்", "எத்தனை", "எவ்வளவு"},
+    "gu": {"શું", "ક્યારે", "ક્યાં", "કેમ", "કેવી", "કેવો", "કોણ", "કેટલા", "કેટલું"},
+}
+
+# Conjunctions that start a new clause and get a comma before them
+CLAUSE_WORDS = {
+    "hi": {"लेकिन", "परंतु", "परन्तु", "किंतु", "किन्तु"},
+    "ta": {"ஆனால்"},
+    "gu": {"પરંતુ"},
+}
+
+SENTENCE_END = {"hi": "।", "ta": ".", "gu": "."}
+
+# Native digits of each script -> ASCII
+DIGIT_ZERO = {"hi": 0x0966, "ta": 0x0BE6, "gu": 0x0AE6}
+
+TERMINAL_PUNCTUATION = "।॥.?!"
+
+
+class TextPostProcessor:
+    """
+    Restore punctuation and normalize numbers, dates and script variants.
+
+    All lookup tables and patterns are built once in the constructor; per
+    segment the work is a single pass over whitespace-separated tokens plus a
+    few precompiled regex substitutions. Error strings returned by IndicASR
+    are passed through unchanged.
+    """
+
+    def __init__(self, language="hi", native_digits=False):
+        """
+        Initialize the post-processor.
+
+        Args:
+            language (str): Language code ('hi', 'ta' or 'gu')
+            native_digits (bool): Write numbers in the native script instead of ASCII
+        """
+        if language not in NUMBER_WORDS:
+            raise ValueError(f"Unsupported language: {language}. Please choose from {list(NUMBER_WORDS.keys())}")
+
+        self.language = language
+        self.numbers = {unicodedata.normalize("NFC", word): value for word, value in NUMBER_WORDS[language].items()}
+        self.question_words = QUESTION_WORDS[language]
+        self.clause_words = CLAUSE_WORDS[language]
+        self.sentence_end = SENTENCE_END[language]
+
+        zero = DIGIT_ZERO[language]
+        self.to_ascii = {zero + digit: str(digit) for digit in range(10)}
+        self.to_native = None
+        if native_digits:
+            self.to_native = str.maketrans({str(digit): chr(zero + digit) for digit in range(10)})
+
+        # Script cleanup: stray ASCII pipes used as danda, repeated spaces, space before punctuation
+        self.pipe_pattern = re.compile(r"\s*\|\s*") if language == "hi" else None
+        self.space_pattern = re.compile(r"\s+")
+        self.punctuation_space_pattern = re.compile(r"\s+([,?!.।॥])")
+
+        months = {name: index + 1 for index, name in enumerate(MONTHS[language])}
+        for variant, name in MONTH_VARIANTS[language].items():
+            months[variant] = months[name]
+        for index, name in enumerate(ENGLISH_MONTHS):
+            months[name] = index + 1
+        self.months = months
+        month_alternation = "|".join(sorted(map(re.escape, months), key=len, reverse=True))
+        # A month must end the word: Indic vowel signs and other combining marks
+        # are not in \w, so the Indic script blocks are excluded explicitly
+        # (except the danda and double danda, which end a sentence)
+        word_end = r"(?![\w\u0900-\u0963\u0966-\u0DFF])"
+        self.date_pattern = re.compile(
+            rf"(?<!\d)(\d{{1,2}}) ({month_alternation}){word_end}(?: (\d{{4}}){word_end})?",
+            re.IGNORECASE
+        )
+
+    def _normalize_numbers(self, tokens):
+        """
+        Replace runs of spoken number words with digits.
+
+        A single small number word (e.g. "एक" as an article) is left as a word
+        unless a month name follows it; runs with a multiplier or values of ten
+        and above are converted.
+        """
+        output = []
+        run = []
+        run_words = []
+
+        def flush(next_token=None):
+            if not run:
+                return
+            total, current = 0, 0
+            for value in run:
+                if value == 100:
+                    current = (current or 1) * value
+                elif value >= 1000:
+                    total += (current or 1) * value
+                    current = 0
+                else:
+                    current += value
+            number = total + current
+            is_day = next_token is not None and (next_token in self.months or next_token.lower() in self.months)
+            if len(run) > 1 or number >= 10 or is_day:
+                output.append(str(number))
+            else:
+                output.append(run_words[0])
+            run.clear()
+            run_words.clear()
+
+        for token in tokens:
+            value = self.numbers.get(token)
+            if value is None:
+                flush(token)
+                output.append(token)
+            else:
+                # Adjacent small numbers ("दो तीन दिन") are a range, not a sum
+                if value < 100 and run and run[-1] < 100:
+                    flush()
+                run.append(value)
+                run_words.append(token)
+        flush()
+        return output
+
+    def _format_date(self, match):
+        """
+        Rewrite '<day> <month> [year]' as DD/MM[/YYYY].
+        """
+        day, month_name, year = match.groups()
+        month = self.months.get(month_name) or self.months.get(month_name.lower())
+        if not 1 <= int(day) <= 31:
+            return match.group(0)
+        date = f"{int(day):02d}/{month:02d}"
+        return f"{date}/{year}" if year else date
+
+    def _restore_punctuation(self, tokens):
+        """
+        Add clause commas and the sentence-final mark.
+        """
+        output = []
+        for index, token in enumerate(tokens):
+            if index > 0 and token in self.clause_words and not output[-1].endswith(","):
+                output[-1] += ","
+            output.append(token)
+
+        if output and output[-1][-1] not in TERMINAL_PUNCTUATION:
+            is_question = any(token.rstrip(",") in self.question_words for token in tokens)
+            output[-1] += "?" if is_question else self.sentence_end
+        return output
+
+    def process(self, text):
+        """
+        Post-process a single transcript.
+
+        Args:
+            text (str): Raw transcript from IndicASR
+
+        Returns:
+            str: Punctuated and normalized transcript
+        """
+        if not text or text.startswith(ERROR_PREFIXES):
+            return text
+        # Whisper often emits only whitespace for silence
+        if not text.strip():
+            return ""
+
+        text = unicodedata.normalize("NFC", text).translate(self.to_ascii)
+        if self.pipe_pattern is not None:
+            text = self.pipe_pattern.sub("। ", text)
+        text = self.punctuation_space_pattern.sub(r"\1", text)
+
+        tokens = self._normalize_numbers(self.space_pattern.split(text.strip()))
+        tokens = self._restore_punctuation(tokens)
+
+        text = self.date_pattern.sub(self._format_date, " ".join(tokens))
+        if self.to_native is not None:
+            text = text.translate(self.to_native)
+        return text
+
+    def process_batch(self, texts):
+        """
+        Post-process a batch of transcripts (e.g. the output of transcribe_batch).
+
+        Args:
+            texts (list): Raw transcripts
+
+        Returns:
+            list: Processed transcripts in the same order
+        """
+        return [self.process(text) for text in texts]
+
+
+_processors = {}
+
+
+def get_postprocessor(language, native_digits=False):
+    """
+    Return a cached post-processor so rule tables are built once per language.
+
+    Args:
+        language (str): Language code ('hi', 'ta' or 'gu')
+        native_digits (bool): Write numbers in the native script
+
+    Returns:
+        TextPostProcessor: Shared post-processor
+    """
+    key = (language, native_digits)
+    if key not in _processors:
+        _processors[key] = TextPostProcessor(language, native_digits)
+    return _processors[key]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Shared Model Weights - One copy of the IndicASR weights across worker processes
+Supports torch shared memory for forked/spawned workers and mmap-ed safetensors
+"""
+
+import json
+import mmap
+import struct
+
+import torch
+import torch.multiprocessing as mp
+from safetensors.torch import save_model
+from transformers import AutoConfig, AutoModelForSpeechSeq2Seq, GenerationConfig
+
+# safetensors header dtype names
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def share_model_weights(asr):
+    """
+    Move the model parameters and buffers into shared memory.
+
+    Afterwards forked workers keep reading the parent's pages, and workers
+    started with torch.multiprocessing receive handles to the same memory
+    instead of a pickled copy.
+
+    Args:
+        asr (IndicASR): Loaded ASR model (CPU only)
+
+    Returns:
+        IndicASR: The same instance, now backed by shared memory
+    """
+    if asr.device != "cpu":
+        raise ValueError(f"Shared-memory weights require a CPU model, got device {asr.device}")
+
+    asr.model.eval()
+    asr.model.share_memory()
+    return asr
+
+
+def start_workers(asr, target, num_workers, args=(), start_method="fork"):
+    """
+    Start worker processes that all use the parent's shared model weights.
+
+    Args:
+        asr (IndicASR): ASR model whose weights are already shared
+        target (callable): Worker function called as target(worker_id, asr, *args)
+        num_workers (int): Number of processes to start
+        args (tuple): Extra arguments passed to every worker
+        start_method (str): 'fork' or 'spawn'
+
+    Returns:
+        list: Started multiprocessing.Process objects
+    """
+    context = mp.get_context(start_method)
+    workers = []
+    for worker_id in range(num_workers):
+        process = context.Process(target=target, args=(worker_id, asr) + tuple(args), daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
+
+
+def export_weights(asr, weights_path):
+    """
+    Write the model weights to a safetensors file for mmap-based loading.
+
+    Place the file on a RAM-backed filesystem (e.g. /dev/shm) or local disk;
+    every process that maps it shares the same page-cache pages.
+
+    Args:
+        asr (IndicASR): Loaded ASR model
+        weights_path (str): Output .safetensors path
+
+    Returns:
+        str: The weights path
+    """
+    save_model(asr.model, weights_path)
+    return weights_path
+
+
+def map_safetensors(weights_path):
+    """
+    Map a safetensors file into memory and return tensors that view it.
+
+    No tensor data is read or copied: pages are loaded on first access and
+    shared between every process mapping the same file. The mapping is
+    copy-on-write, so an accidental in-place update stays private to that
+    process.
+
+    Args:
+        weights_path (str): Path to a .safetensors file
+
+    Returns:
+        dict: Parameter name -> tensor backed by the mapping
+    """
+    with open(weights_path, "rb") as weights_file:
+        header_size = struct.unpack("<Q", weights_file.read(8))[0]
+        header = json.loads(weights_file.read(header_size))
+        buffer = mmap.mmap(weights_file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    state_dict = {}
+    for name, entry in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = SAFETENSORS_DTYPES[entry["dtype"]]
+        begin, end = entry["data_offsets"]
+        count = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + begin)
+        state_dict[name] = tensor.view(entry["shape"])
+    return state_dict
+
+
+def load_mapped_model(model_id, weights_path, torch_dtype, token=None):
+    """
+    Build a speech seq2seq model whose weights live in a mmap-ed safetensors file.
+
+    The module tree is created on the meta device (no memory allocated) and
+    the mapped tensors are assigned in place of the parameters.
+
+    Args:
+        model_id (str): Model id used for the configuration
+        weights_path (str): Path written by export_weights
+        torch_dtype (torch.dtype): Default dtype for the module skeleton
+            (the mapped tensors keep the dtype they were exported with)
+        token (str): Hugging Face token for the configuration download
+
+    Returns:
+        torch.nn.Module: Model in eval mode, on CPU
+    """
+    config = AutoConfig.from_pretrained(model_id, token=token)
+    with torch.device("meta"):
+        model = AutoModelForSpeechSeq2Seq.from_config(config, torch_dtype=torch_dtype)
+
+    # from_config only derives generation settings from config.json; Whisper's
+    # language, task and timestamp token ids live in generation_config.json
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(model_id, token=token)
+    except OSError:
+        model.generation_config = GenerationConfig.from_model_config(config)
+
+    state_dict = map_safetensors(weights_path)
+    _, unexpected = model.load_state_dict(state_dict, strict=False, assign=True)
+    if unexpected:
+        raise ValueError(f"Unexpected weights in {weights_path}: {unexpected[:5]}")
+
+    # Tied weights (e.g. the output projection) are stored once in the file
+    model.tie_weights()
+    tensors = list(model.named_parameters()) + list(model.named_buffers())
+    still_missing = [name for name, tensor in tensors if tensor.is_meta]
+    if still_missing:
+        raise ValueError(f"Missing weights in {weights_path}: {still_missing[:5]}")
+
+    return model.eval()
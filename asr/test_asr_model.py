@@ -7,10 +7,39 @@ import pytest
 import os
 import numpy as np
 import soundfile as sf
+import io
+import pickle
 import tempfile
+import time
 import torch
+import threading
 from unittest.mock import Mock, patch
+from transformers import StoppingCriteriaList
 from Demo_ASR_model import IndicASR, create_sample_audio
+from audio_buffer import AudioRingBuffer
+from audio_reader import stream_audio_chunks, get_audio_info
+from diarization import (
+    detect_speech_segments, OnlineSpeakerClustering, SpeakerDiarizer, transcribe_speakers
+)
+from inference_lanes import InferenceLanes
+from shared_weights import (
+    share_model_weights, start_workers, export_weights, map_safetensors, load_mapped_model
+)
+from biasing import HotwordLogitsProcessor, BiasingCache
+from evaluate_asr import (
+    normalize_text, edit_distance, score_transcript, load_manifest, summarize, _evaluate_entry
+)
+from load_shedding import AdaptiveController, QualityTier, DEFAULT_TIERS
+from cancellation import (
+    CancellationToken, CancellationStoppingCriteria, continue_generation, deadline_from_timeout,
+    CANCELLED_MESSAGE
+)
+from postprocess import TextPostProcessor, get_postprocessor
+from feature_store import FeatureStore
+from adapters import LoRAAdapter, AdapterCache, load_adapter, attach_lora, use_adapters
+from audio_codecs import (
+    decode_mulaw, decode_alaw, resample_audio, decode_audio_bytes, opus_packets_to_ogg
+)
 
 
 class TestIndicASR:
@@ -195,6 +224,1041 @@ class TestMockFunctionality:
         assert asr.processor is not None
 
 
+class TestAudioRingBuffer:
+    """Test class for the microphone capture ring buffer"""
+    
+    def test_write_and_peek_returns_view(self):
+        """Test that windows are views into the buffer, not copies"""
+        buffer = AudioRingBuffer(capacity=8)
+        buffer.write(np.arange(6, dtype=np.float32))
+        
+        window = buffer.peek(4)
+        assert np.array_equal(window, [0, 1, 2, 3])
+        assert np.shares_memory(window, buffer._data)
+        assert not window.flags.writeable
+    
+    def test_wraparound_window_is_contiguous(self):
+        """Test that a window spanning the wrap point is still contiguous"""
+        buffer = AudioRingBuffer(capacity=8)
+        buffer.write(np.arange(6, dtype=np.float32))
+        buffer.advance(5)
+        buffer.write(np.arange(6, 12, dtype=np.float32))
+        
+        window = buffer.peek(7)
+        assert np.array_equal(window, [5, 6, 7, 8, 9, 10, 11])
+        assert window.flags.c_contiguous
+    
+    def test_overrun_and_underrun_counters(self):
+        """Test that dropped writes and short reads are counted"""
+        buffer = AudioRingBuffer(capacity=4)
+        assert buffer.write(np.ones(6)) == 4
+        assert buffer.peek(4) is not None
+        buffer.advance(4)
+        assert buffer.peek(1) is None
+        
+        stats = buffer.stats()
+        assert stats["overruns"] == 1
+        assert stats["overrun_samples"] == 2
+        assert stats["underruns"] == 1
+    
+    def test_overlapping_windows(self):
+        """Test sliding windows with a hop smaller than the window"""
+        buffer = AudioRingBuffer(capacity=16)
+        buffer.write(np.arange(10, dtype=np.float32))
+        
+        windows = [w.copy() for w in buffer.windows(4, hop=3)]
+        assert [w[0] for w in windows] == [0, 3, 6]
+        assert buffer.available == 1
+        assert buffer.stats()["underruns"] == 0
+    
+    def test_invalid_window_size(self):
+        """Test that windows larger than the capacity are rejected"""
+        buffer = AudioRingBuffer(capacity=4)
+        with pytest.raises(ValueError):
+            buffer.peek(5)
+
+
+class TestAudioReader:
+    """Test class for block-wise audio file streaming"""
+    
+    def setup_method(self):
+        """Create a 2.5 second stereo test file"""
+        self.sample_rate = 16000
+        fd, self.audio_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        left = np.linspace(-0.5, 0.5, int(self.sample_rate * 2.5), dtype=np.float32)
+        sf.write(self.audio_path, np.stack([left, -left], axis=1), self.sample_rate)
+    
+    def teardown_method(self):
+        """Remove the test file"""
+        if os.path.exists(self.audio_path):
+            os.remove(self.audio_path)
+    
+    def test_audio_info(self):
+        """Test reading the header without loading samples"""
+        info = get_audio_info(self.audio_path)
+        assert info["sampling_rate"] == self.sample_rate
+        assert info["channels"] == 2
+        assert info["frames"] == 40000
+    
+    def test_fixed_size_chunks(self):
+        """Test that chunks never exceed the configured window"""
+        lengths = []
+        for chunk, sampling_rate in stream_audio_chunks(self.audio_path, chunk_seconds=1.0):
+            assert sampling_rate == self.sample_rate
+            assert chunk.ndim == 1
+            assert chunk.dtype == np.float32
+            lengths.append(len(chunk))
+        assert lengths == [16000, 16000, 8000]
+    
+    def test_stereo_is_downmixed(self):
+        """Test that stereo input is averaged to mono"""
+        for chunk, _ in stream_audio_chunks(self.audio_path, chunk_seconds=1.0):
+            assert np.allclose(chunk, 0.0, atol=1e-4)
+    
+    def test_overlapping_chunks(self):
+        """Test that consecutive chunks share the overlap region"""
+        mono_path = self.audio_path.replace(".wav", "_mono.wav")
+        sf.write(mono_path, np.arange(10, dtype=np.float32) / 10, 10)
+        try:
+            chunks = [chunk.copy() for chunk, _ in stream_audio_chunks(mono_path, 0.4, 0.1)]
+            assert np.allclose(chunks[0][-1], chunks[1][0])
+        finally:
+            os.remove(mono_path)
+    
+    def test_invalid_overlap(self):
+        """Test that an overlap as long as the chunk is rejected"""
+        with pytest.raises(ValueError):
+            next(stream_audio_chunks(self.audio_path, chunk_seconds=1.0, overlap_seconds=1.0))
+    
+    def test_transcribe_rejects_chunks_over_30s(self):
+        """Test that chunks Whisper would truncate are rejected"""
+        asr = Mock()
+        result = IndicASR.transcribe(asr, self.audio_path, chunk_seconds=45.0)
+        assert "chunk_seconds must be at most 30.0" in result
+        asr._transcribe_batch.assert_not_called()
+
+
+def make_voice(f0, formant, duration, sample_rate=16000, seed=0):
+    """Synthesize a harmonic 'voice' with a single formant peak"""
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    signal = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 15))
+    spectrum = np.fft.rfft(signal)
+    freqs = np.fft.rfftfreq(len(signal), 1 / sample_rate)
+    spectrum *= np.exp(-((freqs - formant) / 400) ** 2) + 0.05
+    voice = np.fft.irfft(spectrum, len(signal))
+    noise = np.random.default_rng(seed).standard_normal(len(signal))
+    return (0.3 * voice / np.abs(voice).max() + 0.005 * noise).astype(np.float32)
+
+
+class TestDiarization:
+    """Test class for the speaker diarization stage"""
+    
+    def setup_method(self):
+        """Build a three-turn conversation between two synthetic speakers"""
+        self.sample_rate = 16000
+        silence = np.zeros(self.sample_rate // 2, dtype=np.float32)
+        self.audio = np.concatenate([
+            make_voice(120, 700, 3.0), silence,
+            make_voice(240, 2200, 3.0), silence,
+            make_voice(120, 700, 2.0, seed=1),
+        ])
+    
+    def test_speech_segments(self):
+        """Test that the VAD finds the three speech regions"""
+        segments = detect_speech_segments(self.audio, self.sample_rate)
+        assert len(segments) == 3
+        assert segments[0][0] == 0
+    
+    def test_silence_has_no_segments(self):
+        """Test that pure silence yields no speech"""
+        assert detect_speech_segments(np.zeros(16000, dtype=np.float32), 16000) == []
+    
+    def test_online_clustering(self):
+        """Test incremental assignment to new and existing speakers"""
+        clustering = OnlineSpeakerClustering(threshold=0.9)
+        labels = clustering.assign(np.array([[1.0, 0.0], [0.0, 1.0], [0.99, 0.14]]))
+        assert labels == [0, 1, 0]
+        assert clustering.num_speakers == 2
+    
+    def test_max_speakers(self):
+        """Test that the speaker cap is respected"""
+        clustering = OnlineSpeakerClustering(threshold=0.9, max_speakers=1)
+        assert clustering.assign(np.eye(3)) == [0, 0, 0]
+    
+    def test_diarize_turns(self):
+        """Test that alternating speakers are attributed correctly"""
+        turns = SpeakerDiarizer(self.sample_rate).diarize(self.audio, self.sample_rate)
+        assert [turn["speaker"] for turn in turns] == [0, 1, 0]
+    
+    def test_transcribe_speakers_batches(self):
+        """Test that turns are sent to IndicASR through transcribe_batch"""
+        asr = Mock()
+        asr.transcribe_batch.side_effect = lambda batch, sr: [f"{len(x)}" for x in batch]
+        
+        turns = transcribe_speakers(asr, self.audio, self.sample_rate, batch_size=8)
+        assert asr.transcribe_batch.call_count == 1
+        assert [turn["speaker"] for turn in turns] == ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00"]
+        assert turns[0]["text"] == str(3 * self.sample_rate)
+        assert all(turn["error"] is None for turn in turns)
+    
+    def test_transcribe_speakers_reports_failures(self):
+        """Test that error strings are reported per turn, not as speech"""
+        asr = Mock()
+        asr.transcribe_batch.side_effect = lambda batch, sr: (
+            ["Error: Transcription deadline exceeded"] + ["hello"] * (len(batch) - 1)
+        )
+        
+        turns = transcribe_speakers(asr, self.audio, self.sample_rate, batch_size=8)
+        assert turns[0]["text"] == ""
+        assert turns[0]["error"] == "Error: Transcription deadline exceeded"
+        assert turns[1]["text"] == "hello"
+        assert turns[1]["error"] is None
+
+
+class TestInferenceLanes:
+    """Test class for concurrent use of one IndicASR instance"""
+    
+    def setup_method(self):
+        """Create a mock ASR that records which thread served each call"""
+        self.threads = set()
+        self.asr = Mock()
+        
+        def transcribe_audio_data(audio_data, sampling_rate):
+            self.threads.add(threading.current_thread().name)
+            return f"{len(audio_data)}"
+        
+        self.asr.transcribe_audio_data.side_effect = transcribe_audio_data
+        self.asr.transcribe_batch.side_effect = lambda batch, sr: [f"{len(x)}" for x in batch]
+    
+    def test_map_preserves_order(self):
+        """Test that results come back in input order"""
+        clips = [np.zeros(n) for n in (5, 1, 3, 2)]
+        with InferenceLanes(self.asr, num_lanes=2, intra_op_threads=1) as lanes:
+            assert lanes.map(clips, 16000) == ["5", "1", "3", "2"]
+        assert all(name.startswith("asr-lane") for name in self.threads)
+    
+    def test_shared_model_is_not_copied(self):
+        """Test that all lanes use the same model object"""
+        with InferenceLanes(self.asr, num_lanes=3, intra_op_threads=1) as lanes:
+            assert lanes.asr is self.asr
+            assert lanes.submit_batch([np.zeros(4)], 16000).result() == ["4"]
+        self.asr.model.eval.assert_called_once()
+    
+    def test_default_thread_budget(self):
+        """Test that lanes split the available cores"""
+        lanes = InferenceLanes(self.asr, num_lanes=2)
+        try:
+            assert lanes.intra_op_threads == max(1, len(lanes.cores) // 2)
+        finally:
+            lanes.shutdown()
+    
+    def test_invalid_lane_count(self):
+        """Test that zero lanes is rejected"""
+        with pytest.raises(ValueError):
+            InferenceLanes(self.asr, num_lanes=0)
+
+
+def report_weights(worker_id, asr, queue):
+    """Worker target sending back what the spawned process received"""
+    with asr._quantize_lock:
+        queue.put((worker_id, float(sum(param.sum() for param in asr.model.parameters()))))
+
+
+class TestSharedWeights:
+    """Test class for sharing model weights across worker processes"""
+    
+    def setup_method(self):
+        """Wrap a small torch model in a mock ASR object"""
+        self.asr = Mock()
+        self.asr.device = "cpu"
+        self.asr.model = torch.nn.Sequential(torch.nn.Linear(4, 3), torch.nn.Linear(3, 2))
+        fd, self.weights_path = tempfile.mkstemp(suffix=".safetensors")
+        os.close(fd)
+    
+    def teardown_method(self):
+        """Remove the exported weights"""
+        if os.path.exists(self.weights_path):
+            os.remove(self.weights_path)
+    
+    def test_share_model_weights(self):
+        """Test that parameters are moved into shared memory in place"""
+        share_model_weights(self.asr)
+        assert all(param.is_shared() for param in self.asr.model.parameters())
+    
+    def test_share_requires_cpu(self):
+        """Test that GPU models are rejected"""
+        self.asr.device = "cuda:0"
+        with pytest.raises(ValueError, match="CPU"):
+            share_model_weights(self.asr)
+    
+    def test_mapped_weights_round_trip(self):
+        """Test that mmap-ed tensors match the exported weights"""
+        export_weights(self.asr, self.weights_path)
+        state_dict = map_safetensors(self.weights_path)
+        
+        for name, tensor in self.asr.model.state_dict().items():
+            assert torch.equal(state_dict[name], tensor)
+    
+    def test_mapped_weights_load_without_copy(self):
+        """Test that a model can adopt the mapped tensors directly"""
+        export_weights(self.asr, self.weights_path)
+        state_dict = map_safetensors(self.weights_path)
+        
+        model = torch.nn.Sequential(torch.nn.Linear(4, 3), torch.nn.Linear(3, 2))
+        model.load_state_dict(state_dict, assign=True)
+        assert model[0].weight.data_ptr() == state_dict["0.weight"].data_ptr()
+    
+    def test_spawned_workers_receive_model(self):
+        """Test that IndicASR can be sent to workers started with 'spawn'"""
+        asr = IndicASR.__new__(IndicASR)
+        asr.device = "cpu"
+        asr.model = self.asr.model
+        asr.quantized_model = None
+        asr._quantize_lock = threading.Lock()
+        share_model_weights(asr)
+        
+        queue = torch.multiprocessing.get_context("spawn").Queue()
+        workers = start_workers(asr, report_weights, 2, args=(queue,), start_method="spawn")
+        reports = sorted(queue.get(timeout=60) for _ in workers)
+        for process in workers:
+            process.join(timeout=60)
+        
+        expected = float(sum(param.sum() for param in asr.model.parameters()))
+        assert [worker_id for worker_id, _ in reports] == [0, 1]
+        assert all(total == pytest.approx(expected) for _, total in reports)
+    
+    def test_load_mapped_model_keeps_generation_config(self):
+        """Test that the mmap path loads the same weights and decoder settings"""
+        from transformers import GenerationConfig, WhisperConfig, WhisperForConditionalGeneration
+        
+        with tempfile.TemporaryDirectory() as model_dir:
+            config = WhisperConfig(
+                vocab_size=64, d_model=16, num_mel_bins=8,
+                encoder_layers=1, decoder_layers=1,
+                encoder_attention_heads=2, decoder_attention_heads=2,
+                encoder_ffn_dim=32, decoder_ffn_dim=32,
+                max_source_positions=16, max_target_positions=32,
+                pad_token_id=0, bos_token_id=1, eos_token_id=2, decoder_start_token_id=3
+            )
+            config.save_pretrained(model_dir)
+            GenerationConfig(
+                decoder_start_token_id=1,
+                no_timestamps_token_id=60,
+                lang_to_id={"<|hi|>": 61},
+                task_to_id={"transcribe": 62},
+                is_multilingual=True
+            ).save_pretrained(model_dir)
+            
+            self.asr.model = WhisperForConditionalGeneration(config).eval()
+            export_weights(self.asr, self.weights_path)
+            model = load_mapped_model(model_dir, self.weights_path, torch.float32)
+        
+        assert model.generation_config.no_timestamps_token_id == 60
+        assert model.generation_config.lang_to_id == {"<|hi|>": 61}
+        assert model.generation_config.task_to_id == {"transcribe": 62}
+        assert model.generation_config.is_multilingual
+        for name, tensor in self.asr.model.state_dict().items():
+            assert torch.equal(model.state_dict()[name], tensor)
+
+
+class TestBiasing:
+    """Test class for prompt and hotword biasing"""
+    
+    def test_first_token_boost(self):
+        """Test that the first token of every hotword is boosted"""
+        processor = HotwordLogitsProcessor([((3, 4), 2.0), ((5,), 1.0)])
+        scores = processor(torch.tensor([[0]]), torch.zeros(1, 8))
+        assert scores[0, 3] == 2.0
+        assert scores[0, 5] == 1.0
+        assert scores[0, 4] == 0.0
+    
+    def test_continuation_boost(self):
+        """Test that a started hotword boosts its next token"""
+        processor = HotwordLogitsProcessor([((3, 4, 6), 2.0)])
+        scores = processor(torch.tensor([[1, 3], [1, 2]]), torch.zeros(2, 8))
+        assert scores[0, 4] == 2.0
+        assert scores[1, 4] == 0.0
+    
+    def test_scores_not_modified_in_place(self):
+        """Test that the caller's scores tensor is left untouched"""
+        processor = HotwordLogitsProcessor([((3,), 2.0)])
+        original = torch.zeros(1, 8)
+        processor(torch.tensor([[0]]), original)
+        assert original.sum() == 0
+    
+    def test_cache_tokenizes_once(self):
+        """Test that prompts and hotword lists are tokenized only once"""
+        processor = Mock()
+        processor.get_prompt_ids.return_value = torch.tensor([1, 2])
+        processor.tokenizer.return_value = Mock(input_ids=[7, 8])
+        cache = BiasingCache(processor)
+        
+        cache.prompt_ids("Flipkart UPI")
+        cache.prompt_ids("Flipkart UPI")
+        assert processor.get_prompt_ids.call_count == 1
+        
+        first = cache.hotword_processor(["Flipkart", "UPI"])
+        second = cache.hotword_processor(["UPI", "Flipkart"])
+        assert first is second
+        assert processor.tokenizer.call_count == 4
+    
+    def test_cache_is_bounded(self):
+        """Test that the least recently used prompts are evicted"""
+        processor = Mock()
+        processor.get_prompt_ids.return_value = torch.tensor([1, 2])
+        cache = BiasingCache(processor, capacity=2)
+        
+        for prompt in ["a", "b", "a", "c"]:
+            cache.prompt_ids(prompt)
+        assert list(cache._prompts) == ["a", "c"]
+        assert processor.get_prompt_ids.call_count == 3
+
+
+class TestEvaluation:
+    """Test class for the WER/CER evaluation harness"""
+    
+    def test_normalize_text(self):
+        """Test punctuation, danda, digit and zero-width normalization"""
+        assert normalize_text("नमस्ते, दुनिया।") == "नमस्ते दुनिया"
+        assert normalize_text("१० Rupees!") == "10 rupees"
+        assert normalize_text("க\u200dட") == "கட"
+    
+    def test_edit_distance_matches_dynamic_programming(self):
+        """Test the bit-parallel distance against the textbook table"""
+        def reference_distance(a, b):
+            previous = list(range(len(b) + 1))
+            for i, x in enumerate(a, 1):
+                current = [i]
+                for j, y in enumerate(b, 1):
+                    current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+                previous = current
+            return previous[-1]
+        
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            a = list(rng.integers(0, 4, rng.integers(0, 70)))
+            b = list(rng.integers(0, 4, rng.integers(0, 70)))
+            assert edit_distance(a, b) == reference_distance(a, b)
+    
+    def test_score_transcript(self):
+        """Test word and character error counts"""
+        scores = score_transcript("मेरा नाम राम है।", "मेरा नाम श्याम है")
+        assert scores["word_errors"] == 1
+        assert scores["words"] == 4
+        assert scores["char_errors"] == 3
+    
+    def test_load_manifest(self):
+        """Test JSON-lines manifests with relative audio paths"""
+        with tempfile.TemporaryDirectory() as directory:
+            manifest_path = os.path.join(directory, "test.jsonl")
+            with open(manifest_path, "w", encoding="utf-8") as manifest:
+                manifest.write('{"audio_filepath": "a.wav", "text": "नमस्ते", "duration": 1.0}\n')
+            
+            entries = load_manifest(manifest_path)
+            assert entries == [{"audio_filepath": os.path.join(directory, "a.wav"), "text": "नमस्ते"}]
+    
+    def test_summarize(self):
+        """Test corpus-level WER, CER and latency aggregation"""
+        results = [
+            {"word_errors": 1, "words": 4, "char_errors": 2, "chars": 10, "latency": 0.5, "duration": 2.0},
+            {"word_errors": 0, "words": 6, "char_errors": 0, "chars": 10, "latency": 1.5, "duration": 2.0},
+        ]
+        summary = summarize(results)
+        assert summary["wer"] == pytest.approx(0.1)
+        assert summary["cer"] == pytest.approx(0.1)
+        assert summary["real_time_factor"] == pytest.approx(0.5)
+    
+    def test_failures_reported_separately(self):
+        """Test that error strings are counted as failures, not scored"""
+        with patch("evaluate_asr._worker_asr") as asr:
+            asr.transcribe.return_value = "Error: Audio file not found at missing.wav"
+            result = _evaluate_entry({"audio_filepath": "missing.wav", "text": "नमस्ते"})
+        assert result["failed"]
+        
+        scored = {"word_errors": 1, "words": 4, "char_errors": 2, "chars": 10, "latency": 0.5, "duration": 2.0}
+        summary = summarize([scored, result])
+        assert summary["utterances"] == 1
+        assert summary["failed"] == 1
+        assert summary["wer"] == pytest.approx(0.25)
+
+
+class TestLoadShedding:
+    """Test class for adaptive quality degradation under load"""
+    
+    def setup_method(self):
+        """Create a controller over a mock ASR with no dwell time"""
+        self.asr = Mock()
+        self.asr.transcribe_audio_data.return_value = "text"
+        self.controller = AdaptiveController(
+            self.asr, queue_high=2, queue_low=1, latency_high=10.0, latency_low=5.0, min_dwell=0.0
+        )
+    
+    def test_starts_at_full_quality(self):
+        """Test that an idle controller serves the best tier"""
+        text, tier = self.controller.transcribe_audio_data(np.zeros(10), 16000)
+        assert (text, tier) == ("text", "full")
+        assert self.asr.transcribe_audio_data.call_args.kwargs["tier"] == DEFAULT_TIERS[0]
+    
+    def test_steps_down_on_queue_depth(self):
+        """Test that a deep queue moves requests to cheaper tiers"""
+        self.controller.observe_queue_depth(5)
+        tiers = [self.controller.acquire().name for _ in range(3)]
+        assert tiers == ["greedy", "short", "quantized"]
+        assert self.controller.acquire().name == "quantized"
+    
+    def test_steps_down_on_latency(self):
+        """Test that slow requests trigger a step down"""
+        self.controller.acquire()
+        self.controller.release(latency=20.0)
+        assert self.controller.current_tier.name == "greedy"
+    
+    def test_recovers_when_load_drops(self):
+        """Test that the controller steps back up once load is low"""
+        self.controller.observe_queue_depth(5)
+        self.controller.acquire()
+        self.controller.release(latency=0.1)
+        assert self.controller.current_tier.name == "short"
+        
+        self.controller.observe_queue_depth(0)
+        for _ in range(2):
+            self.controller.acquire()
+            self.controller.release(latency=0.1)
+        assert self.controller.current_tier.name == "full"
+    
+    def test_metrics_export_tier_counts(self):
+        """Test that per-tier request counts are exported"""
+        self.controller.transcribe_audio_data(np.zeros(10), 16000)
+        metrics = self.controller.metrics()
+        assert metrics["tier_counts"]["full"] == 1
+        assert metrics["in_flight"] == 0
+    
+    def test_custom_tiers(self):
+        """Test that custom tier ladders are accepted and empty ones rejected"""
+        tiers = (QualityTier("only", num_beams=1, max_new_tokens=32, quantized=False),)
+        assert AdaptiveController(self.asr, tiers=tiers).current_tier.name == "only"
+        with pytest.raises(ValueError):
+            AdaptiveController(self.asr, tiers=())
+
+
+class FakeDecoder:
+    """Stand-in for a seq2seq model whose generate appends 5, 6, 7, ... per step"""
+    
+    def __init__(self, on_step=None):
+        self.generation_config = Mock(eos_token_id=2, pad_token_id=0, decoder_start_token_id=1)
+        self.on_step = on_step
+        self.calls = []
+    
+    def get_encoder(self):
+        return lambda features: Mock(last_hidden_state=features)
+    
+    def generate(self, encoder_outputs, max_new_tokens, stopping_criteria, decoder_input_ids=None, **kwargs):
+        states = encoder_outputs.last_hidden_state
+        self.calls.append((states, decoder_input_ids, max_new_tokens))
+        input_ids = decoder_input_ids
+        if input_ids is None:
+            input_ids = torch.ones(states.shape[0], 1, dtype=torch.long)
+        for step in range(max_new_tokens):
+            input_ids = torch.cat([input_ids, torch.full((states.shape[0], 1), 5 + step)], dim=1)
+            if self.on_step is not None:
+                self.on_step(len(self.calls), step)
+            if stopping_criteria(input_ids, None).all():
+                break
+        return input_ids
+
+
+class TestCancellation:
+    """Test class for deadlines and cooperative cancellation"""
+    
+    def test_token(self):
+        """Test that a token reports cancellation once cancelled"""
+        token = CancellationToken()
+        assert not token.cancelled
+        token.cancel()
+        assert token.cancelled
+    
+    def test_cancellation_ends_the_step(self):
+        """Test that a cancellation stops every row so the batch can be re-formed"""
+        tokens = [CancellationToken(), CancellationToken()]
+        criteria = CancellationStoppingCriteria(tokens)
+        input_ids = torch.tensor([[1, 2], [1, 3]])
+        
+        assert criteria(input_ids, None).tolist() == [False, False]
+        tokens[1].cancel()
+        assert criteria(torch.tensor([[1, 2, 4], [1, 3, 5]]), None).tolist() == [True, True]
+        assert criteria.cancelled == {1}
+        assert criteria.stopped == set()
+        assert criteria.generated_tokens == 2
+        assert criteria.survivor_prefixes([0]).tolist() == [[1, 2, 4]]
+    
+    def test_beam_rows_map_to_members(self):
+        """Test that survivors resume from the first beam of their member"""
+        tokens = [CancellationToken(), None]
+        tokens[0].cancel()
+        criteria = CancellationStoppingCriteria(tokens)
+        input_ids = torch.tensor([[1, 4], [1, 5], [1, 6], [1, 7]])  # 2 members x 2 beams
+        
+        assert criteria(input_ids, None).tolist() == [True, True, True, True]
+        assert criteria.cancelled == {0}
+        assert criteria.survivor_prefixes([1]).tolist() == [[1, 6]]
+    
+    def test_continue_generation(self):
+        """Test rebuilding resumed outputs with or without the returned prefix"""
+        prefix = torch.tensor([9, 8, 1, 5])  # prompt tokens, start token 1, one generated token
+        assert continue_generation(torch.tensor([9, 8, 1, 5, 6, 2]), prefix, 1).tolist() == [1, 5, 6, 2]
+        assert continue_generation(torch.tensor([6, 2]), prefix, 1).tolist() == [1, 5, 6, 2]
+        assert continue_generation(torch.tensor([1, 5, 2]), None, 1).tolist() == [1, 5, 2]
+    
+    def test_batch_drops_cancelled_member_mid_generation(self):
+        """Test that survivors are resumed without the cancelled member"""
+        tokens = [CancellationToken(), None]
+        model = FakeDecoder(on_step=lambda call, step: tokens[0].cancel() if (call, step) == (1, 1) else None)
+        asr = Mock()
+        asr.model = model
+        asr.feature_store = None
+        asr.device = "cpu"
+        asr.torch_dtype = torch.float32
+        asr.processor.feature_extractor.sampling_rate = 16000
+        asr.processor.return_value = Mock(input_features=torch.arange(12.0).view(2, 1, 6))
+        asr.processor.batch_decode.side_effect = lambda rows, skip_special_tokens: [
+            " ".join(map(str, row.tolist())) for row in rows
+        ]
+        asr._generate_kwargs.return_value = {}
+        asr._get_adapters.return_value = [None, None]
+        
+        tier = QualityTier("greedy", num_beams=1, max_new_tokens=5, quantized=False)
+        results = IndicASR._transcribe_batch(
+            asr, [np.zeros(16000), np.zeros(16000)], 16000, tier=tier, cancel_tokens=tokens
+        )
+        
+        assert results == [CANCELLED_MESSAGE, "1 5 6 5 6 7"]
+        first, second = model.calls
+        assert first[0] == 2 and first[1] is None and first[2] == 5
+        # The survivor keeps its encoder output, its prefix and the remaining budget
+        assert torch.equal(second[0], torch.arange(6.0, 12.0).view(1, 1, 6))
+        assert second[1].tolist() == [[1, 5, 6]]
+        assert second[2] == 3
+    
+    def test_deadline_stops_unfinished_members(self):
+        """Test that an expired deadline stops members still decoding"""
+        criteria = CancellationStoppingCriteria([None, None], deadline_from_timeout(-1.0), eos_token_id=9)
+        stop = criteria(torch.tensor([[1, 9], [1, 2]]), None)
+        assert stop.tolist() == [True, True]
+        assert criteria.stopped == {1}
+    
+    def test_deadline_with_beams_keeps_finished_members(self):
+        """Test that a member whose beam search is done is not reported as stopped"""
+        criteria = CancellationStoppingCriteria(
+            [None, None], deadline_from_timeout(-1.0), eos_token_id=9, pad_token_id=0
+        )
+        # 2 members x 2 beams; member 0 is done and its beams receive padding
+        stop = criteria(torch.tensor([[1, 4, 0], [1, 5, 0], [1, 4, 6], [1, 5, 7]]), None)
+        assert stop.tolist() == [True, True, True, True]
+        assert criteria.stopped == {1}
+    
+    def test_generate_with_beams(self):
+        """Test a cancelled member inside a real beam-search generate call"""
+        from transformers import GPT2Config, GPT2LMHeadModel
+        
+        torch.manual_seed(0)
+        model = GPT2LMHeadModel(GPT2Config(vocab_size=16, n_embd=8, n_layer=1, n_head=2, n_positions=32)).eval()
+        tokens = [CancellationToken(), None]
+        tokens[0].cancel()
+        criteria = CancellationStoppingCriteria(tokens, eos_token_id=15, pad_token_id=0)
+        
+        with torch.inference_mode():
+            output = model.generate(
+                torch.ones(2, 1, dtype=torch.long),
+                num_beams=2,
+                do_sample=False,
+                max_new_tokens=4,
+                eos_token_id=15,
+                pad_token_id=0,
+                stopping_criteria=StoppingCriteriaList([criteria])
+            )
+        
+        # Beam search ends at the first step so the batch can be re-formed
+        assert output.shape[0] == 2
+        assert criteria.generated_tokens == 1
+        assert criteria.cancelled == {0}
+    
+    def test_no_deadline(self):
+        """Test that no timeout means no deadline"""
+        assert deadline_from_timeout(None) is None
+
+
+class TestPostProcessing:
+    """Test class for punctuation and text normalization"""
+    
+    def test_numbers_and_dates(self):
+        """Test spoken numbers and dates become digits"""
+        processor = TextPostProcessor("hi")
+        result = processor.process("मेरा जन्म पंद्रह अगस्त दो हज़ार तेईस को हुआ")
+        assert result == "मेरा जन्म 15/08/2023 को हुआ।"
+        assert processor.process("पाँच मई") == "05/05।"
+        assert processor.process("मैं तीन जून दो हज़ार बीस को आया") == "मैं 03/06/2020 को आया।"
+    
+    def test_month_prefix_is_not_a_date(self):
+        """Test that words merely starting with a month name are left alone"""
+        assert get_postprocessor("ta").process("5 மேலும் வந்தான்") == "5 மேலும் வந்தான்."
+        assert get_postprocessor("gu").process("મેં 5 મેં કહ્યું") == "મેં 5 મેં કહ્યું."
+        assert get_postprocessor("hi").process("5 mayor") == "5 mayor।"
+        assert get_postprocessor("ta").process("ஐந்து மே வந்தான்") == "05/05 வந்தான்."
+        assert get_postprocessor("gu").process("પાંચ મે આવ્યો") == "05/05 આવ્યો."
+    
+    def test_small_numbers_stay_words(self):
+        """Test that articles and ranges are not turned into digits"""
+        processor = TextPostProcessor("hi")
+        assert processor.process("एक दिन") == "एक दिन।"
+        assert processor.process("दो तीन दिन") == "दो तीन दिन।"
+        assert processor.process("पाँच हज़ार दो सौ रुपये") == "5200 रुपये।"
+    
+    def test_punctuation_restoration(self):
+        """Test question marks, clause commas and language-specific sentence ends"""
+        assert get_postprocessor("hi").process("आप कहाँ जा रहे हो") == "आप कहाँ जा रहे हो?"
+        assert get_postprocessor("hi").process("मैं आया लेकिन वह गया") == "मैं आया, लेकिन वह गया।"
+        assert get_postprocessor("gu").process("મારી પાસે પચાસ રૂપિયા છે") == "મારી પાસે 50 રૂપિયા છે."
+        assert get_postprocessor("ta").process("நீங்கள் எங்கே போகிறீர்கள்") == "நீங்கள் எங்கே போகிறீர்கள்?"
+    
+    def test_script_variants(self):
+        """Test native digits, pipe dandas and native digit output"""
+        assert get_postprocessor("hi").process("१२ लोग | सब आए") == "12 लोग। सब आए।"
+        assert TextPostProcessor("hi", native_digits=True).process("बीस लोग आए") == "२० लोग आए।"
+    
+    def test_batch_passes_errors_through(self):
+        """Test batch processing keeps order and leaves error strings alone"""
+        texts = ["बीस लोग", "Error: Transcription cancelled", ""]
+        assert get_postprocessor("hi").process_batch(texts) == ["20 लोग।", "Error: Transcription cancelled", ""]
+    
+    def test_whitespace_only_text(self):
+        """Test that silence transcribed as whitespace does not break a batch"""
+        assert get_postprocessor("hi").process_batch([" ", "\n\t", "बीस लोग"]) == ["", "", "20 लोग।"]
+    
+    def test_invalid_language(self):
+        """Test that unsupported languages are rejected"""
+        with pytest.raises(ValueError, match="Unsupported language"):
+            TextPostProcessor("xx")
+
+
+def read_ogg_packets(data):
+    """Split an Ogg stream into its packets"""
+    packets, packet, position = [], b"", 0
+    while position < len(data):
+        segments = data[position + 26]
+        lacing = data[position + 27:position + 27 + segments]
+        position += 27 + segments
+        for length in lacing:
+            packet += data[position:position + length]
+            position += length
+            if length < 255:
+                packets.append(packet)
+                packet = b""
+    return packets
+
+
+def make_webm(opus_head, packets):
+    """Build a minimal live-style WebM (unknown-size segment and cluster)"""
+    def element(element_id, payload):
+        id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+        return id_bytes + ((1 << 56) | len(payload)).to_bytes(8, "big") + payload
+    
+    unknown_size = b"\x01" + b"\xff" * 7
+    track = element(0xAE, element(0xD7, b"\x01") + element(0x86, b"A_OPUS") + element(0x63A2, opus_head))
+    blocks = b"".join(element(0xA3, b"\x81\x00\x00\x80" + packet) for packet in packets)
+    return (
+        element(0x1A45DFA3, element(0x4282, b"webm"))
+        + (0x18538067).to_bytes(4, "big") + unknown_size
+        + element(0x1654AE6B, track)
+        + (0x1F43B675).to_bytes(4, "big") + unknown_size
+        + element(0xE7, b"\x00") + blocks
+    )
+
+
+class TestAudioCodecs:
+    """Test class for in-process telephony and browser audio decoding"""
+    
+    def setup_method(self):
+        """Encode one second of a 440 Hz tone as Ogg/Opus"""
+        t = np.arange(48000) / 48000
+        self.tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        buffer = io.BytesIO()
+        sf.write(buffer, self.tone, 48000, format="OGG", subtype="OPUS")
+        self.ogg = buffer.getvalue()
+    
+    def test_g711_tables(self):
+        """Test known G.711 code points"""
+        assert decode_mulaw(b"\xff")[0] == 0.0
+        assert decode_mulaw(b"\x00")[0] == pytest.approx(-32124 / 32768)
+        assert decode_alaw(b"\xd5")[0] == pytest.approx(8 / 32768)
+        assert decode_alaw(b"\x55")[0] == pytest.approx(-8 / 32768)
+        assert decode_mulaw(bytes(range(256))).dtype == np.float32
+    
+    def test_raw_mulaw_is_resampled(self):
+        """Test that 8 kHz telephony audio lands at 16 kHz"""
+        audio, sampling_rate = decode_audio_bytes(b"\xff" * 8000, codec="mulaw")
+        assert sampling_rate == 16000
+        assert len(audio) == 16000
+    
+    def test_raw_g711_requires_codec(self):
+        """Test that raw bytes without a container need an explicit codec"""
+        with pytest.raises(ValueError, match="codec"):
+            decode_audio_bytes(b"\xff" * 100)
+    
+    def test_resample_accuracy(self):
+        """Test that a resampled sine matches the analytic signal"""
+        tone_8k = np.sin(2 * np.pi * 1000 * np.arange(8000) / 8000)
+        tone_16k = resample_audio(tone_8k, 8000, 16000)
+        expected = np.sin(2 * np.pi * 1000 * np.arange(16000) / 16000)
+        assert np.abs(tone_16k[200:-200] - expected[200:-200]).max() < 1e-2
+    
+    @pytest.mark.parametrize("sampling_rate", [44100, 22050])
+    def test_resample_music_rates(self, sampling_rate):
+        """Test that 44.1 and 22.05 kHz audio resamples accurately and quickly"""
+        tone = np.sin(2 * np.pi * 1000 * np.arange(sampling_rate) / sampling_rate)
+        tone_16k = resample_audio(tone, sampling_rate, 16000)
+        expected = np.sin(2 * np.pi * 1000 * np.arange(16000) / 16000)
+        assert len(tone_16k) == 16000
+        assert tone_16k.dtype == np.float32
+        assert np.abs(tone_16k[200:-200] - expected[200:-200]).max() < 1e-2
+        
+        # A full 30 s Whisper window must not take minutes
+        start = time.perf_counter()
+        chunk = resample_audio(np.zeros(30 * sampling_rate, dtype=np.float32), sampling_rate, 16000)
+        assert len(chunk) == 30 * 16000
+        assert time.perf_counter() - start < 2.0
+    
+    def test_ogg_opus(self):
+        """Test Ogg/Opus decoding detected from the container"""
+        audio, sampling_rate = decode_audio_bytes(self.ogg)
+        assert sampling_rate == 16000
+        assert abs(len(audio) - 16000) < 200
+    
+    def test_webm_opus(self):
+        """Test WebM/Opus from a browser recorder is remuxed and decoded"""
+        packets = read_ogg_packets(self.ogg)
+        webm = make_webm(packets[0], packets[2:])
+        
+        audio, sampling_rate = decode_audio_bytes(webm)
+        assert sampling_rate == 16000
+        assert abs(len(audio) - 16000) < 200
+        assert np.abs(audio).max() == pytest.approx(0.3, abs=0.05)
+    
+    def test_remuxed_ogg_is_valid(self):
+        """Test that rebuilt Ogg pages pass libsndfile's CRC checks"""
+        packets = read_ogg_packets(self.ogg)
+        audio, sampling_rate = sf.read(io.BytesIO(opus_packets_to_ogg(packets[0], packets[2:])))
+        assert sampling_rate == 48000
+        assert len(audio) > 47000
+    
+    def test_transcribe_encoded(self):
+        """Test that IndicASR feeds decoded audio into the 16 kHz pipeline"""
+        asr = Mock()
+        asr.transcribe_audio_data.return_value = "text"
+        
+        assert IndicASR.transcribe_encoded(asr, b"\xd5" * 800, codec="alaw") == "text"
+        audio, sampling_rate = asr.transcribe_audio_data.call_args.args
+        assert sampling_rate == 16000
+        assert len(audio) == 1600
+
+
+class TestFeatureStore:
+    """Test class for the on-disk feature and encoder-output store"""
+    
+    def setup_method(self):
+        """Open a store in a temporary directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(self.directory.name)
+        self.audio = np.linspace(-1, 1, 1600, dtype=np.float32)
+    
+    def teardown_method(self):
+        """Remove the store"""
+        self.directory.cleanup()
+    
+    def test_key_depends_on_audio_and_rate(self):
+        """Test that keys identify the exact clip and sampling rate"""
+        key = FeatureStore.make_key(self.audio, 16000)
+        assert key == FeatureStore.make_key(self.audio.copy(), 16000)
+        assert key != FeatureStore.make_key(self.audio, 8000)
+        assert key != FeatureStore.make_key(self.audio[::-1], 16000)
+    
+    def test_round_trip_is_memory_mapped(self):
+        """Test that stored entries come back as float16 memory maps"""
+        key = FeatureStore.make_key(self.audio, 16000)
+        assert self.store.get("ai4bharat/indic-whisper-v2-hi", key, "encoder") is None
+        
+        self.store.put("ai4bharat/indic-whisper-v2-hi", key, "encoder", np.ones((3, 4), dtype=np.float32))
+        entry = self.store.get("ai4bharat/indic-whisper-v2-hi", key, "encoder")
+        assert isinstance(entry, np.memmap)
+        assert entry.dtype == np.float16
+        assert np.array_equal(entry, np.ones((3, 4)))
+        assert self.store.stats() == {"hits": 1, "misses": 1}
+    
+    def test_entries_are_per_model(self):
+        """Test that different models never share encoder states"""
+        key = FeatureStore.make_key(self.audio, 16000)
+        self.store.put("ai4bharat/indic-whisper-v2-hi", key, "encoder", np.ones(2))
+        assert self.store.get("ai4bharat/indic-whisper-v2-ta", key, "encoder") is None
+    
+    def test_invalid_kind(self):
+        """Test that unknown entry kinds are rejected"""
+        with pytest.raises(ValueError, match="Unknown entry kind"):
+            self.store.get("model", "abcd", "logits")
+    
+    def test_encoder_skipped_on_second_run(self):
+        """Test that IndicASR reuses stored encoder states"""
+        asr = Mock()
+        asr.feature_store = self.store
+        asr.model_id = "ai4bharat/indic-whisper-v2-hi"
+        asr.device = "cpu"
+        asr.torch_dtype = torch.float32
+        asr.processor.return_value = Mock(input_features=np.ones((1, 4, 6), dtype=np.float32))
+        encoder = Mock(side_effect=lambda features: Mock(last_hidden_state=features * 2))
+        asr.model.get_encoder.return_value = encoder
+        
+        first = IndicASR._encode_with_store(asr, [self.audio], 16000)
+        second = IndicASR._encode_with_store(asr, [self.audio], 16000)
+        assert torch.equal(first, second)
+        assert first.shape == (1, 4, 6)
+        assert encoder.call_count == 1
+        assert asr.processor.call_count == 1
+
+
+def make_lora_state(seed, prefix="base_model.model."):
+    """Create PEFT-style LoRA weights for the decoder.q_proj test layer"""
+    generator = torch.Generator().manual_seed(seed)
+    return {
+        f"{prefix}decoder.q_proj.lora_A.weight": torch.randn(2, 4, generator=generator),
+        f"{prefix}decoder.q_proj.lora_B.weight": torch.randn(3, 2, generator=generator),
+    }
+
+
+class TestAdapters:
+    """Test class for per-speaker LoRA adapters"""
+    
+    def setup_method(self):
+        """Build a tiny model with one hookable decoder layer"""
+        torch.manual_seed(0)
+        self.model = torch.nn.ModuleDict({
+            "encoder": torch.nn.ModuleDict({"q_proj": torch.nn.Linear(4, 3)}),
+            "decoder": torch.nn.ModuleDict({"q_proj": torch.nn.Linear(4, 3)}),
+        })
+        self.layer = self.model["decoder"]["q_proj"]
+        self.shapes = attach_lora(self.model)
+        self.directory = tempfile.TemporaryDirectory()
+    
+    def teardown_method(self):
+        """Remove saved adapters"""
+        self.directory.cleanup()
+    
+    def make_adapter(self, name, seed):
+        """Create an in-memory adapter"""
+        state = make_lora_state(seed, prefix="")
+        weights = {"decoder.q_proj": (state["decoder.q_proj.lora_A.weight"], state["decoder.q_proj.lora_B.weight"])}
+        return LoRAAdapter(name, weights, scale=0.5)
+    
+    def expected(self, x, adapter):
+        """Reference output with the update merged into the weight"""
+        A, B = adapter.weights["decoder.q_proj"]
+        weight = self.layer.weight + adapter.scale * B @ A
+        return torch.nn.functional.linear(x, weight, self.layer.bias)
+    
+    def test_only_decoder_layers_hooked(self):
+        """Test that the encoder is left untouched"""
+        assert self.shapes == {"decoder.q_proj": (4, 3)}
+        assert attach_lora(self.model) is self.shapes
+        assert "decoder.q_proj.weight" in self.model.state_dict()
+    
+    def test_base_model_without_adapters(self):
+        """Test that layers are unchanged outside use_adapters"""
+        x = torch.randn(2, 5, 4)
+        with use_adapters([None, None]):
+            assert torch.equal(self.layer(x), torch.nn.functional.linear(x, self.layer.weight, self.layer.bias))
+    
+    def test_shared_adapter_matches_merged_weights(self):
+        """Test the low-rank update against a merged weight matrix"""
+        adapter = self.make_adapter("speaker-a", 1)
+        x = torch.randn(2, 5, 4)
+        with torch.inference_mode(), use_adapters([adapter, adapter]):
+            output = self.layer(x)
+        assert torch.allclose(output, self.expected(x, adapter), atol=1e-5)
+    
+    def test_mixed_batch_with_beams(self):
+        """Test that each member's beam rows get that member's adapter"""
+        speaker_a = self.make_adapter("speaker-a", 1)
+        speaker_b = self.make_adapter("speaker-b", 2)
+        x = torch.randn(6, 1, 4)  # 3 members x 2 beams
+        with torch.inference_mode(), use_adapters([speaker_a, None, speaker_b]):
+            output = self.layer(x)
+        
+        assert torch.allclose(output[0:2], self.expected(x[0:2], speaker_a), atol=1e-5)
+        assert torch.allclose(output[2:4], torch.nn.functional.linear(x[2:4], self.layer.weight, self.layer.bias))
+        assert torch.allclose(output[4:6], self.expected(x[4:6], speaker_b), atol=1e-5)
+    
+    def test_load_peft_directory(self):
+        """Test loading a PEFT adapter with its config"""
+        from safetensors.torch import save_file
+        
+        path = os.path.join(self.directory.name, "tenant-1")
+        os.makedirs(path)
+        save_file(make_lora_state(1), os.path.join(path, "adapter_model.safetensors"))
+        with open(os.path.join(path, "adapter_config.json"), "w") as config_file:
+            config_file.write('{"r": 2, "lora_alpha": 8}')
+        
+        adapter = load_adapter(path)
+        assert adapter.name == "tenant-1"
+        assert list(adapter.weights) == ["decoder.q_proj"]
+        assert adapter.rank == 2
+        assert adapter.scale == 4.0
+    
+    def test_cache_is_lru(self):
+        """Test that the least recently used adapter is evicted"""
+        for index, name in enumerate(["a", "b", "c"]):
+            torch.save(make_lora_state(index), os.path.join(self.directory.name, f"{name}.pt"))
+        cache = AdapterCache(self.directory.name, capacity=2, module_shapes=self.shapes)
+        
+        first = cache.get("a")
+        cache.get("b")
+        assert cache.get("a") is first
+        cache.get("c")
+        
+        stats = cache.stats()
+        assert stats["adapters"] == ["a", "c"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+        assert stats["evictions"] == 1
+    
+    def test_cache_is_picklable(self):
+        """Test that the cache survives pickling for spawned workers"""
+        cache = AdapterCache(self.directory.name, module_shapes=self.shapes)
+        cache.register(self.make_adapter("speaker-a", 1))
+        
+        restored = pickle.loads(pickle.dumps(cache))
+        assert restored.stats()["adapters"] == ["speaker-a"]
+        assert torch.equal(
+            restored.get("speaker-a").weights["decoder.q_proj"][0],
+            cache.get("speaker-a").weights["decoder.q_proj"][0]
+        )
+    
+    def test_cache_rejects_bad_adapters(self):
+        """Test id validation, missing files and shape checks"""
+        cache = AdapterCache(self.directory.name, module_shapes={"decoder.q_proj": (8, 3)})
+        torch.save(make_lora_state(0), os.path.join(self.directory.name, "wrong.pt"))
+        
+        with pytest.raises(ValueError, match="Invalid adapter id"):
+            cache.get("../wrong")
+        with pytest.raises(FileNotFoundError):
+            cache.get("missing")
+        with pytest.raises(ValueError, match="does not match"):
+            cache.get("wrong")
+    
+    def test_adapters_require_adapter_dir(self):
+        """Test that adapter ids without an adapter cache are rejected"""
+        asr = Mock(adapter_cache=None)
+        assert IndicASR._get_adapters(asr, None, [0]) == [None]
+        with pytest.raises(ValueError, match="adapter_dir"):
+            IndicASR._get_adapters(asr, ["speaker-a"], [0])
+
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"])